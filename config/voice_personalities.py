@@ -88,6 +88,31 @@ AGENT_VOICES: Dict[str, Dict[str, Any]] = {
     }
 }
 
+# Response cache TTLs (seconds) per agent - 0 disables caching for that agent.
+# Only enable for agents whose answers are safe to repeat for a few minutes
+# (e.g. "what's on my calendar today"); a hit skips the Codex run entirely.
+RESPONSE_CACHE_TTL: Dict[str, float] = {
+    "router": 0,
+    "office": 0,      # e.g. 120 to reuse calendar/inbox summaries for 2 minutes
+    "analyst": 0,     # e.g. 60 for quote lookups
+    "procurement": 0,
+    "engineering": 0,
+    "accounting": 0
+}
+
+# Approximate token budget for the conversation context sent with each prompt.
+# Older turns are dropped (or summarized, see CONTEXT_SUMMARY_TOKENS) beyond it;
+# smaller budgets keep prompts short and Codex responses quick.
+CONTEXT_TOKEN_BUDGET: Dict[str, int] = {
+    "router": 1200,   # Open-ended questions benefit from more history
+    "office": 600,
+    "analyst": 800,
+    "procurement": 600,
+    "engineering": 800,
+    "accounting": 600
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 800
+
 # Voice fallback configuration
 FALLBACK_VOICE = {
     "voice": "en_US-amy-medium",
@@ -182,6 +207,14 @@ def get_agent_voice(agent: str) -> Dict[str, Any]:
     """Get voice configuration for an agent"""
     return AGENT_VOICES.get(agent, FALLBACK_VOICE)
 
+def get_response_cache_ttl(agent: str) -> float:
+    """Get response cache TTL in seconds for an agent (0 = don't cache)"""
+    return RESPONSE_CACHE_TTL.get(agent, 0)
+
+def get_context_token_budget(agent: str) -> int:
+    """Get the conversation context token budget for an agent"""
+    return CONTEXT_TOKEN_BUDGET.get(agent, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
 def get_agent_from_keywords(text: str) -> str:
     """Detect agent from keywords in text"""
     text_lower = text.lower()
@@ -103,14 +103,15 @@ class CodexGateway:
         msg = params.get("msg", {})
         event_type = msg.get("type")
         
-        # Silent internal events
+        # Session setup - pass through so clients can bind the conversation
+        # to its request and time how long configuration took
         if event_type == "session_configured":
-            return None
+            return obj
             
         # Preserve event types for proper multi-stage handling
         # Agent message streaming
         elif event_type == "agent_message_delta":
-            return {
+            converted = {
                 "jsonrpc": "2.0",
                 "method": f"notifications/{event_type}",
                 "params": {
@@ -121,7 +122,7 @@ class CodexGateway:
         
         # Reasoning streaming (for TTS)
         elif event_type in ["agent_reasoning_delta", "agent_reasoning_raw_content_delta"]:
-            return {
+            converted = {
                 "jsonrpc": "2.0",
                 "method": f"notifications/{event_type}",
                 "params": {
@@ -132,10 +133,10 @@ class CodexGateway:
         
         # Tool call events - pass through but marked
         elif event_type in ["mcp_tool_call_begin", "mcp_tool_call_end"]:
-            return {
+            converted = {
                 "jsonrpc": "2.0",
                 "method": f"notifications/{event_type}",
-                "params": msg
+                "params": dict(msg)
             }
         
         # Task completion - preserve original structure
@@ -144,7 +145,7 @@ class CodexGateway:
         
         # Other events as structured data
         else:
-            return {
+            converted = {
                 "jsonrpc": "2.0",
                 "method": "notifications/message",
                 "params": {
@@ -153,6 +154,12 @@ class CodexGateway:
                     "logger": "codex"
                 }
             }
+        
+        # Keep the originating request id so clients sharing one
+        # connection across prompts can route the notification
+        if "_meta" in params:
+            converted["params"]["_meta"] = params["_meta"]
+        return converted
     
     async def forward_stderr(self):
         """Forward stderr to log file"""
@@ -5,15 +5,14 @@ Handles communication between Windows voice capture and WSL MCP servers
 """
 
 import asyncio
-import json
 import logging
 import os
+import time
 import aiohttp
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, Optional, Set, AsyncIterator, Callable
 from pathlib import Path
 from datetime import datetime, timedelta
 
-import uvicorn
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
@@ -26,12 +25,20 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import SSE client
 from mcp_sse_client import get_mcp_client, close_mcp_client
+from uds_server import run_server
+from sse_frames import FrameEncoder, COMPLETE_FRAME
+from sentence_segmenter import SentenceSegmenter
+
+# Import single-flight layer for duplicate prompts
+from request_coalescer import get_coalescer, coalesce_key
+from response_cache import get_response_cache
 
 # Import session manager and voice config
-from session_manager import get_session_manager, process_with_session, record_response
+from session_manager import get_session_manager, close_session_manager, process_with_session, record_response
 from config.voice_personalities import (
     get_agent_voice, get_agent_from_keywords, 
-    get_handoff_message, get_email_announcement
+    get_handoff_message, get_email_announcement,
+    get_response_cache_ttl
 )
 
 # Configure logging
@@ -47,6 +54,39 @@ app = FastAPI(title="Windows-WSL Bridge Service")
 
 # Whisper service endpoint
 WHISPER_SERVICE = "http://127.0.0.1:7001"
+WHISPER_UDS = os.environ.get("WHISPER_UDS")  # Reach Whisper over its Unix socket instead of TCP
+
+# Optional Unix domain socket for local callers (the Windows client stays on TCP)
+BRIDGE_UDS = os.environ.get("BRIDGE_UDS")
+
+# Shared HTTP connection pool for calls to local services
+HTTP_POOL_LIMIT = int(os.environ.get("BRIDGE_HTTP_POOL_LIMIT", "32"))  # Total pooled connections
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("BRIDGE_HTTP_POOL_LIMIT_PER_HOST", "16"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get("BRIDGE_HTTP_KEEPALIVE_TIMEOUT", "60"))  # Idle seconds before closing
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("BRIDGE_HTTP_CONNECT_TIMEOUT", "5"))
+WHISPER_TIMEOUT = float(os.environ.get("BRIDGE_WHISPER_TIMEOUT", "120"))  # Total time for one transcription
+
+http_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Get the app-wide HTTP session (created at startup, or on first use)"""
+    global http_session
+    if http_session is None or http_session.closed:
+        pool_options = dict(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+        )
+        if WHISPER_UDS:
+            # Requests still use WHISPER_SERVICE URLs; only the transport changes
+            connector = aiohttp.UnixConnector(path=WHISPER_UDS, **pool_options)
+        else:
+            connector = aiohttp.TCPConnector(**pool_options)
+        http_session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=WHISPER_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        )
+    return http_session
 
 class VoiceRequest(BaseModel):
     """Voice command request"""
@@ -108,16 +148,36 @@ async def send_to_mcp(server: str, prompt: str, stream: bool = False,
             full_prompt = f"Previous context:\n{context}\n\nCurrent request: {prompt}"
         
         async with get_mcp_client() as client:
+            # Replay a recent answer for agents that opted into caching
+            cache = get_response_cache()
+            cache_ttl = get_response_cache_ttl(server)
+            cache_key = coalesce_key(server, prompt, context)
+            cached = cache.get(cache_key) if cache_ttl > 0 else None
+            
+            def start_request():
+                upstream = client.send_prompt(server, full_prompt, stream=True, return_on_first_result=return_on_first_result)
+                if cache_ttl > 0:
+                    upstream = cache.record(cache_key, cache_ttl, upstream)
+                return upstream
+            
+            if cached is not None:
+                logger.info(f"Serving cached response for {server}")
+                response_stream = cache.replay(cached)
+            else:
+                # Identical in-flight prompts share one Codex run. The upstream
+                # always streams so both streaming and collecting callers can join.
+                response_stream = get_coalescer().subscribe(server, prompt, context, start_request)
+            
             if stream:
                 # Return async generator for streaming (voice path uses this)
-                return client.send_prompt(server, full_prompt, stream=True, return_on_first_result=return_on_first_result)
+                return response_stream
             else:
                 # Collect multi-part response
                 reasoning_parts = []
                 message_parts = []
                 full_response = None
                 
-                async for chunk in client.send_prompt(server, full_prompt, stream=False, return_on_first_result=return_on_first_result):
+                async for chunk in response_stream:
                     if chunk["type"] == "reasoning":
                         reasoning_parts.append(chunk["content"])
                     elif chunk["type"] == "message":
@@ -186,32 +246,97 @@ async def transcribe_audio(audio_base64: str) -> str:
     Returns:
         Transcribed text
     """
-    import base64
-    import tempfile
-    import os
-    
     # Send base64 audio directly to Whisper service
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=120)) as session:
-            async with session.post(
-                f"{WHISPER_SERVICE}/transcribe",
-                json={"audio_data": audio_base64},
-                headers={"Content-Type": "application/json"}
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    return result["transcription"]
-                else:
-                    error_text = await response.text()
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"Whisper error: {error_text}"
-                    )
+        async with get_http_session().post(
+            f"{WHISPER_SERVICE}/transcribe",
+            json={"audio_data": audio_base64},
+            headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                return result["transcription"]
+            else:
+                error_text = await response.text()
+                raise HTTPException(
+                    status_code=response.status,
+                    detail=f"Whisper error: {error_text}"
+                )
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+        logger.exception(f"Transcription error: {error_msg}")
+        raise HTTPException(status_code=500, detail=f"Transcription failed: {error_msg}")
+
+async def transcribe_audio_stream(body: AsyncIterator[bytes], content_type: str) -> str:
+    """
+    Stream raw audio to Whisper's binary endpoint for transcription
+    
+    Args:
+        body: Audio bytes as they arrive from the client
+        content_type: Audio media type (audio/wav, audio/ogg, audio/L16...)
+    
+    Returns:
+        Transcribed text
+    """
+    try:
+        async with get_http_session().post(
+            f"{WHISPER_SERVICE}/transcribe/raw",
+            data=body,
+            headers={"Content-Type": content_type}
+        ) as response:
+            if response.status == 200:
+                result = await response.json()
+                return result["transcription"]
+            else:
+                error_text = await response.text()
+                raise HTTPException(
+                    status_code=response.status,
+                    detail=f"Whisper error: {error_text}"
+                )
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
         logger.exception(f"Transcription error: {error_msg}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {error_msg}")
 
+async def with_deadlines(source: AsyncIterator[Dict[str, Any]],
+                         next_deadline: Callable[[], Optional[float]]) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Iterate over source, yielding None whenever next_deadline() passes
+    
+    Lets a consumer act on time-based deadlines (time.monotonic) while it
+    waits for a slow stream, without losing the chunk being awaited.
+    """
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+            
+            deadline = next_deadline()
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                yield None
+                continue
+            
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield None
+                continue
+            
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield chunk
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
 @app.post("/voice/command")
 async def handle_voice_command(request: VoiceRequest):
     """
@@ -241,8 +366,8 @@ async def handle_voice_command(request: VoiceRequest):
         termination_phrases = ["end session", "goodbye", "close session", "that's all", "thank you goodbye", "bye bye"]
         if any(phrase in prompt.lower() for phrase in termination_phrases):
             # Handle session termination
+            # The MCP client is shared by every caller, so it stays open
             logger.info("Session termination command detected")
-            await close_mcp_client()
             
             # Get voice for goodbye message
             voice_config = get_agent_voice(request.wake_word.lower())
@@ -292,102 +417,84 @@ async def handle_voice_command(request: VoiceRequest):
         # ALWAYS use streaming for voice commands for immediate responses
         if True:  # Force streaming for all voice commands
             # Stream responses back
+            # Serialize everything that is fixed for this response once
+            speed = voice_config.get("speed", 1.0)
+            pitch = voice_config.get("pitch", 1.0)
+            frames = FrameEncoder(server=server, session_id=session_id)
+            voiced = dict(voice=voice_config["voice"], skip_tts=False)
+            frames.define("intermediate", "intermediate", **voiced)
+            frames.define("status", "status", voice_config={
+                "speed": speed * 1.3,  # Faster for status
+                "pitch": pitch * 0.9   # Lower for status
+            }, **voiced)
+            frames.define("reasoning", "reasoning", voice_config={
+                "speed": speed * 1.2,  # 20% faster
+                "pitch": pitch * 0.95  # 5% lower
+            }, **voiced)  # TTS enabled for reasoning
+            frames.define("heartbeat", "heartbeat", voice_config={
+                "speed": speed * 1.1,  # Slightly faster
+                "pitch": pitch
+            }, **voiced)  # Sent to TTS for feedback
+            frames.define("message", "message", voice_config={"speed": speed, "pitch": pitch}, **voiced)
+            frames.define("final", "message", voice=voice_config["voice"],
+                          voice_config={"speed": speed, "pitch": pitch}, is_final=True)
+            
             async def generate():
-                reasoning_buffer = []
-                has_sent_reasoning = False
+                # Group reasoning and answer deltas into sentences for TTS
+                reasoning = SentenceSegmenter()
+                message = SentenceSegmenter()
+                
+                def next_deadline() -> Optional[float]:
+                    deadlines = [d for d in (reasoning.deadline(), message.deadline()) if d is not None]
+                    return min(deadlines) if deadlines else None
                 
                 response_generator = await send_to_mcp(server, prompt, stream=True, context=session_info["context"], return_on_first_result=True)
-                async for chunk in response_generator:
+                async for chunk in with_deadlines(response_generator, next_deadline):
+                    # Latency deadline passed with text still pending
+                    if chunk is None:
+                        for text in reasoning.poll():
+                            yield frames.frame("reasoning", text)
+                        for text in message.poll():
+                            yield frames.frame("message", text)
+                    
                     # Handle intermediate human-readable messages
-                    if chunk["type"] == "intermediate":
+                    elif chunk["type"] == "intermediate":
                         # Stream intermediate text immediately for TTS
-                        data = json.dumps({
-                            "type": "intermediate",
-                            "content": chunk["content"],
-                            "server": server,
-                            "session_id": session_id,
-                            "voice": voice_config["voice"],
-                            "skip_tts": False
-                        })
-                        yield f"data: {data}\n\n"
+                        yield frames.frame("intermediate", chunk["content"])
                     
                     # Handle status updates
                     elif chunk["type"] == "status":
                         # Stream status updates with different voice settings
-                        data = json.dumps({
-                            "type": "status",
-                            "content": chunk["content"],
-                            "server": server,
-                            "session_id": session_id,
-                            "voice": voice_config["voice"],
-                            "voice_config": {
-                                "speed": voice_config.get("speed", 1.0) * 1.3,  # Faster for status
-                                "pitch": voice_config.get("pitch", 1.0) * 0.9   # Lower for status
-                            },
-                            "skip_tts": False
-                        })
-                        yield f"data: {data}\n\n"
+                        yield frames.frame("status", chunk["content"])
                     
-                    # Handle reasoning chunks - stream to TTS
+                    # Handle reasoning chunks - stream to TTS a sentence at a time
                     elif chunk["type"] == "reasoning":
-                        reasoning_buffer.append(chunk["content"])
-                        
-                        # Stream reasoning in sentence chunks for natural TTS
-                        if len(reasoning_buffer) >= 10 or \
-                           (reasoning_buffer and any(p in reasoning_buffer[-1] for p in '.!?:')):
-                            reasoning_text = " ".join(reasoning_buffer)
-                            reasoning_buffer.clear()
-                            
-                            data = json.dumps({
-                                "type": "reasoning", 
-                                "content": reasoning_text,
-                                "server": server,
-                                "session_id": session_id,
-                                "voice": voice_config["voice"],
-                                "voice_config": {
-                                    "speed": voice_config.get("speed", 1.0) * 1.2,  # 20% faster
-                                    "pitch": voice_config.get("pitch", 1.0) * 0.95  # 5% lower
-                                },
-                                "skip_tts": False  # ENABLE TTS for reasoning
-                            })
-                            yield f"data: {data}\n\n"
+                        for text in reasoning.push(chunk["content"]):
+                            yield frames.frame("reasoning", text)
                     
                     # Handle heartbeat events - periodic updates during silence
                     elif chunk["type"] == "heartbeat":
                         # Send heartbeat as a progress update for TTS
                         elapsed = chunk.get("elapsed", 0)
                         elapsed_str = f" ({int(elapsed)} seconds)" if elapsed > 10 else ""
-                        data = json.dumps({
-                            "type": "heartbeat",
-                            "content": chunk["content"] + elapsed_str,
-                            "server": server,
-                            "session_id": session_id,
-                            "voice": voice_config["voice"],
-                            "voice_config": {
-                                "speed": voice_config.get("speed", 1.0) * 1.1,  # Slightly faster
-                                "pitch": voice_config.get("pitch", 1.0)
-                            },
-                            "skip_tts": False  # Send to TTS for feedback
-                        })
-                        yield f"data: {data}\n\n"
+                        yield frames.frame("heartbeat", chunk["content"] + elapsed_str, elapsed=elapsed)
                     
                     elif chunk["type"] in ("message", "chunk"):
-                        # Stream human-readable text chunks
-                        data = json.dumps({
-                            "type": "message",  # Windows client expects "message"
-                            "content": chunk["content"],
-                            "server": server,
-                            "session_id": session_id,
-                            "voice": voice_config["voice"],
-                            "voice_config": {
-                                "speed": voice_config.get("speed", 1.0),
-                                "pitch": voice_config.get("pitch", 1.0)
-                            },
-                            "skip_tts": False
-                        })
-                        yield f"data: {data}\n\n"
+                        # Reasoning is over once the answer starts
+                        for text in reasoning.flush():
+                            yield frames.frame("reasoning", text)
+                        
+                        # Stream human-readable sentences (Windows client expects "message")
+                        for text in message.push(chunk["content"]):
+                            yield frames.frame("message", text)
                     
                     elif chunk["type"] == "result":
+                        # Speak whatever is still buffered before the final text
+                        for text in reasoning.flush():
+                            yield frames.frame("reasoning", text)
+                        for text in message.flush():
+                            yield frames.frame("message", text)
+                        
                         # Extract and send final text
                         final_text = ""
                         content_obj = chunk.get("content")
@@ -406,34 +513,27 @@ async def handle_voice_command(request: VoiceRequest):
                             final_text = content_obj
                         
                         if final_text:
-                            data = json.dumps({
-                                "type": "message",
-                                "content": final_text,
-                                "server": server,
-                                "session_id": session_id,
-                                "voice": voice_config["voice"],
-                                "voice_config": {
-                                    "speed": voice_config.get("speed", 1.0),
-                                    "pitch": voice_config.get("pitch", 1.0)
-                                },
-                                "is_final": True
-                            })
-                            yield f"data: {data}\n\n"
+                            yield frames.frame("final", final_text)
                         
                         # Signal stream complete
-                        yield f'data: {{"type": "complete"}}\n\n'
+                        yield COMPLETE_FRAME
                         break  # End the stream properly
                     
                     else:
                         # Unknown event types - forward as-is for debugging
                         logger.debug(f"Forwarding unknown chunk type: {chunk.get('type')}")
-                        data = json.dumps({
+                        yield frames.event({
                             "type": chunk["type"],
                             "content": chunk.get("content", ""),
                             "server": server,
                             "session_id": session_id
                         })
-                        yield f"data: {data}\n\n"
+            
+                # Nothing is left after a result, but a stream can also end without one
+                for text in reasoning.flush():
+                    yield frames.frame("reasoning", text)
+                for text in message.flush():
+                    yield frames.frame("message", text)
             
             return StreamingResponse(
                 generate(),
@@ -453,6 +553,37 @@ async def handle_voice_command(request: VoiceRequest):
         logger.error(f"Full traceback: {tb}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/voice/command/audio")
+async def handle_voice_command_audio(request: Request,
+                                     wake_word: str = "router",
+                                     session_id: Optional[str] = None,
+                                     stream: bool = False,
+                                     two_stage_mode: bool = False,
+                                     enable_tts: bool = True):
+    """
+    Handle a voice command whose audio is the raw request body
+    
+    Same as /voice/command, but the audio (WAV, Opus or audio/L16 PCM) is
+    streamed through to Whisper instead of being base64 encoded inside
+    JSON. Command options are passed as query parameters.
+    """
+    content_type = request.headers.get("content-type", "audio/wav")
+    if not content_type.startswith("audio/"):
+        raise HTTPException(status_code=415, detail=f"Expected an audio/* body, got {content_type}")
+    
+    logger.info(f"Transcribing streamed audio ({content_type})...")
+    prompt = await transcribe_audio_stream(request.stream(), content_type)
+    logger.info(f"Transcribed: {prompt}")
+    
+    return await handle_voice_command(VoiceRequest(
+        text=prompt,
+        wake_word=wake_word,
+        session_id=session_id,
+        stream=stream,
+        two_stage_mode=two_stage_mode,
+        enable_tts=enable_tts
+    ))
+
 @app.get("/email/notification")
 async def validate_webhook(validation_token: Optional[str] = None):
     """
@@ -504,35 +635,48 @@ async def health_check():
         async with get_mcp_client() as client:
             server_status = await client.health_check()
             status["servers"] = server_status
+            status["mcp_configure"] = client.configure_stats()
     except Exception as e:
         logger.error(f"Error checking MCP health: {e}")
         status["servers"] = {"error": str(e)}
     
+    status["coalescing"] = get_coalescer().stats()
+    status["response_cache"] = get_response_cache().stats()
+    status["session_writes"] = get_session_manager().writer.stats()
+    
     # Check Whisper service
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{WHISPER_SERVICE}/health", timeout=2) as response:
-                if response.status == 200:
-                    status["whisper"] = "healthy"
-                else:
-                    status["whisper"] = "unhealthy"
+        async with get_http_session().get(
+            f"{WHISPER_SERVICE}/health",
+            timeout=aiohttp.ClientTimeout(total=2)
+        ) as response:
+            if response.status == 200:
+                status["whisper"] = "healthy"
+            else:
+                status["whisper"] = "unhealthy"
     except:
         status["whisper"] = "unreachable"
     
     return status
 
 @app.get("/servers")
-async def list_servers():
+async def list_servers(reload: bool = False):
     """
-    List available MCP servers and their endpoints
+    List available MCP servers, their endpoints and cached tool catalogues
+    
+    Pass reload=true to refetch the tool catalogues from the servers
     """
     servers = {}
     async with get_mcp_client() as client:
+        if reload:
+            await client.reload_tools()
         for name, server in client.servers.items():
             servers[name] = f"SSE connection to {server.url}"
+        tools = client.tool_catalogue()
     
     return {
         "servers": servers,
+        "tools": tools,
         "whisper": WHISPER_SERVICE,
         "wake_words": {
             "router": ["router", "assistant", "deep thought"],
@@ -640,14 +784,29 @@ async def email_status():
     }
 
 @app.get("/sessions")
-async def get_sessions():
+async def get_sessions(offset: int = 0,
+                       limit: int = 50,
+                       channel: Optional[str] = None,
+                       agent: Optional[str] = None,
+                       include_expired: bool = False):
     """
-    Get all active sessions
+    Get active sessions, most recent first, a page at a time
+    
+    Filter by channel or agent; include_expired also lists stored
+    history (with SESSION_STORE=sqlite) that has timed out.
     """
+    if offset < 0 or not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 500")
+    
     manager = get_session_manager()
-    return {
-        "sessions": manager.get_active_sessions()
-    }
+    await manager.writer.flush()  # List what has just been written, too
+    return manager.get_active_sessions(
+        offset=offset,
+        limit=limit,
+        channel=channel,
+        agent=agent,
+        include_expired=include_expired
+    )
 
 @app.get("/sessions/{session_id}")
 async def get_session(session_id: str):
@@ -687,17 +846,47 @@ async def handoff_session(session_id: str, target_agent: str, context: Optional[
         "new_voice": new_voice
     }
 
+# Background MCP warm-up, held so it isn't garbage-collected mid-run
+warm_up_task: Optional[asyncio.Task] = None
+
+def log_task_failure(task: asyncio.Task):
+    """Done-callback that logs the exception of a background task"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()!r}", exc_info=task.exception())
+
+@app.on_event("startup")
+async def startup_event():
+    """Open the shared HTTP pool and pre-open warm MCP sessions so the first voice command skips the handshake"""
+    global warm_up_task
+    get_http_session()
+    async with get_mcp_client() as client:
+        warm_up_task = asyncio.create_task(client.warm_up(), name="mcp_warm_up")
+        warm_up_task.add_done_callback(log_task_failure)
+        client.start_health_monitor()
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Clean up SSE connections on shutdown"""
+    """Clean up SSE connections, the HTTP pool and the session journal on shutdown"""
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+        try:
+            await warm_up_task
+        except asyncio.CancelledError:
+            pass
     await close_mcp_client()
     logger.info("Closed all MCP connections")
+    
+    await close_session_manager()
+    
+    if http_session is not None:
+        await http_session.close()
 
 if __name__ == "__main__":
-    uvicorn.run(
+    run_server(
         app,
         host="0.0.0.0",  # Listen on all interfaces for Windows access
         port=7000,
+        uds=BRIDGE_UDS,
         log_level="info",
         timeout_keep_alive=600  # 10 minute keep-alive for long operations
     )
\ No newline at end of file
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Conversation Context Builder
+Keeps the rendered recent-turns context of a session within a token budget, updated per turn
+"""
+
+import os
+from collections import deque
+from typing import Deque, Tuple
+
+# Tokens of the rolling "earlier in this conversation" summary (0 disables it)
+CONTEXT_SUMMARY_TOKENS = int(os.environ.get("CONTEXT_SUMMARY_TOKENS", "0"))
+
+# Words of each older request kept in the summary
+SUMMARY_WORDS_PER_TURN = 12
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English)"""
+    return (len(text) + 3) // 4
+
+def clip_to_tokens(text: str, tokens: int) -> str:
+    """Shorten text to roughly the given number of tokens"""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:max(limit - 1, 0)].rstrip() + "…"
+
+class ContextWindow:
+    """
+    The most recent turns of a conversation, rendered for the prompt
+    
+    add() appends a line and evicts the oldest ones while the window is
+    over its token budget or turn limit, so each turn costs the same no
+    matter how long the session is. Evicted user requests can be folded
+    into a short summary line that is kept within its own budget.
+    """
+    
+    def __init__(self, budget_tokens: int, max_turns: int = 10,
+                 summary_tokens: int = CONTEXT_SUMMARY_TOKENS):
+        self.budget_tokens = budget_tokens
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self._lines: Deque[Tuple[str, int, bool]] = deque()  # (line, tokens, is_user)
+        self._tokens = 0
+        self._text = ""
+        self._topics: Deque[Tuple[str, int]] = deque()
+        self._topic_tokens = 0
+        self._summary = ""
+    
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens of the rendered context"""
+        return self._tokens + estimate_tokens(self._summary)
+    
+    def add(self, label: str, content: str, is_user: bool = False):
+        """Append one turn"""
+        # A single oversized turn is clipped rather than emptying the window
+        content = clip_to_tokens(content, max(self.budget_tokens - estimate_tokens(label) - 1, 1))
+        line = f"{label}: {content}\n"
+        tokens = estimate_tokens(line)
+        
+        self._lines.append((line, tokens, is_user))
+        self._tokens += tokens
+        self._text += line
+        
+        evicted = 0
+        while len(self._lines) > 1 and (self._tokens > self.budget_tokens or len(self._lines) > self.max_turns):
+            old_line, old_tokens, old_is_user = self._lines.popleft()
+            self._tokens -= old_tokens
+            evicted += len(old_line)
+            if old_is_user:
+                self._summarize(old_line)
+        if evicted:
+            self._text = self._text[evicted:]
+    
+    def _summarize(self, line: str):
+        """Fold an evicted request into the summary"""
+        if self.summary_tokens <= 0:
+            return
+        
+        words = line.split(":", 1)[-1].split()
+        topic = " ".join(words[:SUMMARY_WORDS_PER_TURN]) + ("…" if len(words) > SUMMARY_WORDS_PER_TURN else "")
+        tokens = estimate_tokens(topic) + 1
+        self._topics.append((topic, tokens))
+        self._topic_tokens += tokens
+        while len(self._topics) > 1 and self._topic_tokens > self.summary_tokens:
+            self._topic_tokens -= self._topics.popleft()[1]
+        
+        self._summary = "Earlier in this conversation the user asked: " + "; ".join(
+            topic for topic, _ in self._topics
+        ) + "\n"
+    
+    def render(self) -> str:
+        """The context string: optional summary line, then the recent turns"""
+        return self._summary + self._text
@@ -7,7 +7,7 @@ Manages SSE connections to MCP servers via mcp-proxy
 import asyncio
 import json
 import logging
-from typing import Dict, Any, Optional, AsyncGenerator
+from typing import Dict, Any, Optional, AsyncGenerator, List, Set, Callable
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 import os
@@ -25,6 +25,7 @@ class MCPServer:
     url: str
     codex_home: str
     tool_name: str  # Tool name for this server (e.g., "codex")
+    uds: Optional[str] = None  # Unix socket path, from MCP_<NAME>_UDS (None = TCP)
 
 @dataclass
 class SSESession:
@@ -33,6 +34,334 @@ class SSESession:
     event_source: Any  # SSE connection
     created_at: datetime
 
+# Connection sizing (per MCP server)
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "4"))  # Max open connections per server (requests wait for a free one)
+MCP_POOL_MIN_IDLE = int(os.environ.get("MCP_POOL_MIN_IDLE", "1"))  # Connections kept warm ahead of demand
+MCP_CONNECT_TIMEOUT = float(os.environ.get("MCP_CONNECT_TIMEOUT", "10"))  # Endpoint + initialize timeout
+MCP_REQUEST_TIMEOUT = float(os.environ.get("MCP_REQUEST_TIMEOUT", "30"))  # Timeout for short RPCs like tools/list
+MCP_CONFIGURED_TIMEOUT = float(os.environ.get("MCP_CONFIGURED_TIMEOUT", "2"))  # Max wait for session_configured after initialize
+MCP_HEARTBEAT_INTERVAL = float(os.environ.get("MCP_HEARTBEAT_INTERVAL", "5"))  # Silence before a streaming heartbeat (0 disables)
+
+# Health probing
+MCP_HEALTH_TIMEOUT = float(os.environ.get("MCP_HEALTH_TIMEOUT", "5"))  # Per-server probe timeout
+MCP_HEALTH_TTL = float(os.environ.get("MCP_HEALTH_TTL", "15"))  # Max age of cached health status
+
+class MCPSession:
+    """
+    A warm, initialized SSE connection to one MCP server
+    
+    A single background reader task owns the SSE stream, parses each event
+    once and routes it to the per-request queue it belongs to:
+    - responses by JSON-RPC id
+    - notifications by _meta.requestId, or by codex conversation id once a
+      session_configured event has bound that conversation to a request
+    
+    Once the server is seen tagging its notifications, many prompts can be
+    in flight on the same connection. Until then the connection is only
+    handed to one prompt at a time, since untagged events can't be routed.
+    """
+    
+    def __init__(self, server: MCPServer, client: httpx.AsyncClient, next_id,
+                 on_tools_changed: Optional[Callable[[str], None]] = None):
+        self.server = server
+        self.client = client
+        self._next_id = next_id
+        self._on_tools_changed = on_tools_changed
+        self.endpoint_url: Optional[str] = None
+        self.created_at = datetime.now()
+        self.last_used = datetime.now()
+        self.configured = asyncio.Event()  # Set by the reader on session_configured
+        self.configure_seconds: Optional[float] = None
+        # None until we've seen a notification; then whether it carried a routing key
+        self.tags_notifications: Optional[bool] = None
+        self._pending: Dict[Any, asyncio.Queue] = {}
+        self._subscribers: Dict[Any, asyncio.Queue] = {}
+        self._conversations: Dict[str, Any] = {}
+        self._endpoint_received = asyncio.Event()
+        self._reader_task: Optional[asyncio.Task] = None
+    
+    @property
+    def alive(self) -> bool:
+        """True while the SSE stream is open"""
+        return self._reader_task is not None and not self._reader_task.done()
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of prompts currently streaming on this connection"""
+        return len(self._subscribers)
+    
+    @property
+    def session_configured(self) -> bool:
+        """True once the server has reported session_configured"""
+        return self.configured.is_set()
+    
+    @property
+    def multiplexed(self) -> bool:
+        """True if concurrent prompts can safely share this connection"""
+        return self.tags_notifications is True
+    
+    async def connect(self, timeout: float = MCP_CONNECT_TIMEOUT,
+                      configured_timeout: float = MCP_CONFIGURED_TIMEOUT):
+        """
+        Open the SSE stream, wait for the endpoint event and run the MCP
+        initialize handshake
+        
+        Args:
+            timeout: Limit for the endpoint event and the initialize response
+            configured_timeout: How long to wait for session_configured after
+                initialization (0 to skip)
+        
+        Raises:
+            ConnectionError: If the stream closes before an endpoint arrives
+            asyncio.TimeoutError: If the handshake takes longer than timeout
+        """
+        self._reader_task = asyncio.create_task(self._read_events())
+        
+        await asyncio.wait_for(self._endpoint_received.wait(), timeout)
+        if not self.endpoint_url:
+            raise ConnectionError(f"SSE stream to {self.server.name} closed before endpoint event")
+        
+        data = await self.request("initialize", {
+            "protocolVersion": "0.1.0",
+            "capabilities": {
+                "tools": {},
+                "prompts": {},
+                "resources": {}
+            },
+            "clientInfo": {
+                "name": "bridge-client",
+                "version": "1.0.0"
+            }
+        }, timeout=timeout)
+        if "error" in data:
+            raise ConnectionError(f"initialize failed: {data['error']}")
+        
+        response = await self.post({
+            "jsonrpc": "2.0",
+            "method": "notifications/initialized",
+            "params": {}
+        })
+        if response.status_code not in (200, 202):
+            raise ConnectionError(f"initialized notification rejected: {response.status_code}")
+        
+        if configured_timeout > 0:
+            await self.wait_configured(configured_timeout)
+        
+        logger.info(f"MCP session to {self.server.name} ready: {self.endpoint_url}")
+    
+    async def wait_configured(self, timeout: float) -> bool:
+        """
+        Wait for the reader to see session_configured
+        
+        Returns early if the SSE stream closes. Records how long the server
+        took in configure_seconds.
+        
+        Returns:
+            True if the session was configured within timeout
+        """
+        if self.configured.is_set():
+            return True
+        
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        waiter = asyncio.create_task(self.configured.wait())
+        try:
+            await asyncio.wait(
+                {waiter, self._reader_task},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            waiter.cancel()
+        
+        if self.configured.is_set():
+            self.configure_seconds = loop.time() - started
+            logger.info(f"{self.server.name} configured in {self.configure_seconds * 1000:.0f}ms")
+            return True
+        
+        logger.info(f"{self.server.name} sent no session_configured within {timeout}s")
+        return False
+    
+    async def post(self, message: Dict[str, Any]) -> httpx.Response:
+        """POST a JSON-RPC message to the session endpoint"""
+        return await self.client.post(
+            self.endpoint_url,
+            json=message,
+            headers={"Content-Type": "application/json"}
+        )
+    
+    async def request(self, method: str, params: Dict[str, Any],
+                      timeout: float = MCP_REQUEST_TIMEOUT) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request and wait for its response
+        
+        Returns:
+            The full response message (containing "result" or "error")
+        """
+        request_id = self._next_id()
+        queue = self.register(request_id)
+        try:
+            response = await self.post({
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params,
+                "id": request_id
+            })
+            if response.status_code not in (200, 202):
+                raise ConnectionError(f"{method} rejected: {response.status_code}")
+            
+            data = await asyncio.wait_for(queue.get(), timeout)
+            if data is None:
+                raise ConnectionError(f"SSE stream to {self.server.name} closed during {method}")
+            return data
+        finally:
+            self.unregister(request_id)
+    
+    async def cancel(self, request_id: Any, reason: str):
+        """Tell the server we no longer want the result of request_id"""
+        try:
+            await self.post({
+                "jsonrpc": "2.0",
+                "method": "notifications/cancelled",
+                "params": {"requestId": request_id, "reason": reason}
+            })
+        except Exception as e:
+            logger.debug(f"Could not cancel request {request_id} on {self.server.name}: {e}")
+    
+    def register(self, request_id: Any, subscribe: bool = False) -> asyncio.Queue:
+        """
+        Register a queue for responses to request_id
+        
+        Args:
+            request_id: JSON-RPC id to route
+            subscribe: Also route notifications for this request to the queue
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._pending[request_id] = queue
+        if subscribe:
+            self._subscribers[request_id] = queue
+        return queue
+    
+    def queue(self, request_id: Any) -> asyncio.Queue:
+        """Queue registered for request_id"""
+        return self._pending[request_id]
+    
+    def unregister(self, request_id: Any):
+        """Stop routing messages for request_id"""
+        self._pending.pop(request_id, None)
+        self._subscribers.pop(request_id, None)
+        for conversation_id, owner in list(self._conversations.items()):
+            if owner == request_id:
+                del self._conversations[conversation_id]
+    
+    def _notification_owner(self, params: Dict[str, Any]) -> Any:
+        """Find the request a notification belongs to, or None"""
+        meta = params.get("_meta")
+        if isinstance(meta, dict) and meta.get("requestId") is not None:
+            request_id = meta["requestId"]
+            msg = params.get("msg")
+            if isinstance(msg, dict) and msg.get("type") == "session_configured" and msg.get("session_id"):
+                self._conversations[msg["session_id"]] = request_id
+            return request_id
+        
+        conversation_id = params.get("conversationId") or params.get("conversation_id")
+        if conversation_id is not None:
+            return self._conversations.get(conversation_id)
+        return None
+    
+    def _dispatch(self, data: Dict[str, Any]):
+        """Route a parsed JSON-RPC message to its waiting queue"""
+        message_id = data.get("id")
+        if message_id is not None and "method" not in data:
+            queue = self._pending.get(message_id)
+            if queue is not None:
+                queue.put_nowait(data)
+            else:
+                logger.debug(f"Dropping response for unknown request {message_id} on {self.server.name}")
+            return
+        
+        method = data.get("method")
+        params = data.get("params")
+        if not isinstance(params, dict):
+            params = {}
+        
+        if method == "notifications/tools/list_changed":
+            logger.info(f"Tool list changed on {self.server.name}")
+            if self._on_tools_changed is not None:
+                self._on_tools_changed(self.server.name)
+            return
+        
+        if method == "session_configured" or (
+            method == "codex/event" and params.get("msg", {}).get("type") == "session_configured"
+        ):
+            self.configured.set()
+        
+        owner = self._notification_owner(params)
+        if owner is not None:
+            self.tags_notifications = True
+            queue = self._subscribers.get(owner)
+            if queue is not None:
+                queue.put_nowait(data)
+            return
+        
+        if self.tags_notifications is None:
+            self.tags_notifications = False
+        
+        # Untagged: only deliverable when a single prompt is streaming
+        if len(self._subscribers) == 1:
+            next(iter(self._subscribers.values())).put_nowait(data)
+        elif self._subscribers:
+            logger.warning(f"Dropping unroutable {method} notification on shared {self.server.name} connection")
+    
+    async def _read_events(self):
+        """Own the SSE stream and demultiplex incoming messages"""
+        sse_url = f"{self.server.url}/sse"
+        logger.info(f"Connecting to SSE endpoint: {sse_url}")
+        try:
+            async with aconnect_sse(
+                self.client,
+                "GET",
+                sse_url,
+                headers={"Accept": "text/event-stream"},
+                # Idle pooled sessions may see no events for a long time
+                timeout=httpx.Timeout(MCP_CONNECT_TIMEOUT, read=None)
+            ) as event_source:
+                async for event in event_source.aiter_sse():
+                    logger.debug(f"Received SSE event: type={event.event}, data_len={len(event.data) if event.data else 0}")
+                    
+                    if event.event == "endpoint":
+                        if not self.endpoint_url:
+                            # The endpoint is sent directly as plain text, not JSON
+                            self.endpoint_url = urljoin(self.server.url, event.data)
+                            self._endpoint_received.set()
+                        continue
+                    
+                    if event.event == "message" or (event.event is None and event.data):
+                        try:
+                            data = json.loads(event.data)
+                        except json.JSONDecodeError as e:
+                            logger.warning(f"Invalid JSON from {self.server.name}: {e} - Data: {event.data[:100]}")
+                            continue
+                        self._dispatch(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"SSE stream to {self.server.name} ended: {e}")
+        finally:
+            self._endpoint_received.set()
+            # Wake everyone still waiting on this connection
+            for queue in list(self._pending.values()):
+                queue.put_nowait(None)
+    
+    async def close(self):
+        """Cancel the reader task, closing the SSE stream"""
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
 class MCPSSEClient:
     """
     Manages SSE connections to MCP servers via mcp-proxy
@@ -66,54 +395,237 @@ class MCPSSEClient:
         
         # Increase timeout to 10 minutes for complex MCP operations
         self.client = httpx.AsyncClient(timeout=600.0)
+        
+        # Servers reachable over a Unix socket get their own client; URLs are unchanged
+        self._uds_clients: Dict[str, httpx.AsyncClient] = {}
+        for name, server in self.servers.items():
+            server.uds = os.environ.get(f"MCP_{name.upper()}_UDS") or None
+            if server.uds:
+                self._uds_clients[name] = httpx.AsyncClient(
+                    timeout=600.0,
+                    transport=httpx.AsyncHTTPTransport(uds=server.uds)
+                )
+                logger.info(f"Using unix socket {server.uds} for {name}")
         self._message_id = 1
         self.sessions: Dict[str, SSESession] = {}
         
+        # Open, initialized connections per server (shared by concurrent requests)
+        self._connections: Dict[str, List[MCPSession]] = {name: [] for name in self.servers}
+        self._opening: Dict[str, int] = {name: 0 for name in self.servers}
+        self._pool_changed: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in self.servers}
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # session_configured timing per server and stage
+        self._configure_metrics: Dict[str, Dict[str, Dict[str, Any]]] = {
+            name: {
+                stage: {"configured": 0, "timeouts": 0, "total_ms": 0.0, "last_ms": None, "max_ms": 0.0}
+                for stage in ("handshake", "prompt")
+            }
+            for name in self.servers
+        }
+        self._never_configured: Set[str] = set()
+        
+        # Tool catalogue per server, invalidated on tools/list_changed
+        self._tools: Dict[str, Dict[str, Any]] = {}
+        self._tools_fetched_at: Dict[str, datetime] = {}
+        
+        # Cached health status, refreshed in the background
+        self._health: Dict[str, str] = {}
+        self._health_checked_at: Optional[float] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._health_monitor: Optional[asyncio.Task] = None
+        
     def _get_next_id(self) -> int:
         """Get next message ID for JSON-RPC"""
         current = self._message_id
         self._message_id += 1
         return current
     
-    async def _get_endpoint_from_sse(self, server_name: str) -> str:
-        """
-        Connect to SSE and get the endpoint URL for messages
+    async def _open_session(self, server_name: str) -> MCPSession:
+        """Open and initialize a new connection to a server"""
+        client = self._uds_clients.get(server_name, self.client)
+        session = MCPSession(self.servers[server_name], client, self._get_next_id,
+                             on_tools_changed=self.invalidate_tools)
+        # Don't keep waiting on servers that have never reported session_configured
+        configured_timeout = 0 if server_name in self._never_configured else MCP_CONFIGURED_TIMEOUT
         
-        Returns:
-            The endpoint URL containing session_id for POST messages
+        self._opening[server_name] += 1
+        try:
+            await session.connect(configured_timeout=configured_timeout)
+        except BaseException:
+            await session.close()
+            raise
+        finally:
+            self._opening[server_name] -= 1
+            self._pool_changed[server_name].set()
+        
+        if configured_timeout > 0:
+            self._record_configure(server_name, "handshake", session.configure_seconds)
+            if session.configure_seconds is None and not self._configure_metrics[server_name]["handshake"]["configured"]:
+                self._never_configured.add(server_name)
+        self._connections[server_name].append(session)
+        return session
+    
+    def _prune(self, server_name: str) -> List[MCPSession]:
+        """Drop connections whose SSE stream has closed"""
+        connections = self._connections[server_name]
+        for session in [s for s in connections if not s.alive]:
+            connections.remove(session)
+            self._spawn(session.close())
+        return connections
+    
+    async def _acquire_session(self, server_name: str,
+                               request_id: Any = None) -> MCPSession:
         """
-        if server_name not in self.servers:
-            raise ValueError(f"Unknown server: {server_name}")
+        Pick a connection for a request, opening a new one only if needed
         
-        server = self.servers[server_name]
-        sse_url = f"{server.url}/sse"
-        
-        # Connect to SSE and listen for endpoint event
-        async with aconnect_sse(
-            self.client,
-            "GET",
-            sse_url,
-            headers={"Accept": "text/event-stream"}
-        ) as event_source:
+        With request_id, the prompt is registered as a subscriber before
+        returning, so no other prompt can claim an exclusive connection in
+        between. Without it (plain request/response RPCs) any live
+        connection will do, since responses are routed by id. Once
+        MCP_POOL_SIZE connections are open and none can take the request,
+        it waits up to MCP_CONNECT_TIMEOUT for one to be released.
+        
+        Raises:
+            asyncio.TimeoutError: No connection was released in time
+        """
+        deadline = asyncio.get_running_loop().time() + MCP_CONNECT_TIMEOUT
+        while True:
+            connections = self._prune(server_name)
+            session = None
             
-            # Listen for the first event which should be "endpoint"
-            async for event in event_source.aiter_sse():
-                if event.event == "endpoint":
-                    # The endpoint is sent directly as plain text, not JSON
-                    endpoint_path = event.data
-                    
-                    # Build full URL
-                    if endpoint_path.startswith("http"):
-                        return endpoint_path
-                    else:
-                        # Relative path, combine with server URL
-                        return urljoin(server.url, endpoint_path)
+            if request_id is None:
+                if connections:
+                    session = min(connections, key=lambda s: s.in_flight)
+            else:
+                shared = [s for s in connections if s.multiplexed]
+                idle = [s for s in connections if s.in_flight == 0]
+                if shared:
+                    session = min(shared, key=lambda s: s.in_flight)
+                elif idle:
+                    session = idle[0]
+            
+            if session is not None or len(connections) + self._opening[server_name] < MCP_POOL_SIZE:
+                break
             
-        # If we get here, no endpoint was received
-        # Fall back to default pattern
-        import uuid
-        session_id = str(uuid.uuid4())
-        return f"{server.url}/messages/?session_id={session_id}"
+            # Every connection is busy with an exclusive prompt; wait for one to be released
+            logger.info(f"All {MCP_POOL_SIZE} connections to {server_name} are busy, waiting for a free one")
+            self._pool_changed[server_name].clear()
+            try:
+                await asyncio.wait_for(self._pool_changed[server_name].wait(),
+                                       timeout=max(deadline - asyncio.get_running_loop().time(), 0))
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(
+                    f"All {MCP_POOL_SIZE} connections to {server_name} stayed busy for {MCP_CONNECT_TIMEOUT:g}s"
+                )
+        
+        if session is None:
+            logger.info(f"No warm connection available for {server_name}, opening a new one")
+            session = await self._open_session(server_name)
+        
+        if request_id is not None:
+            session.register(request_id, subscribe=True)
+            session.last_used = datetime.now()
+            # Keep a connection warm for the next request
+            self._spawn(self._refill(server_name))
+        return session
+    
+    def _release_session(self, session: MCPSession, request_id: Any, completed: bool):
+        """
+        Finish a prompt on a connection
+        
+        Abandoned prompts are cancelled server-side. If the connection can't
+        route notifications per request, it's retired so that the abandoned
+        prompt's remaining events can't leak into the next one.
+        """
+        session.unregister(request_id)
+        connections = self._connections[session.server.name]
+        
+        if not completed:
+            self._spawn(session.cancel(request_id, "client stopped reading"))
+            if not session.multiplexed and session in connections:
+                connections.remove(session)
+                self._spawn(session.close())
+        self._pool_changed[session.server.name].set()
+        
+        # Close surplus idle connections
+        limit = max(MCP_POOL_MIN_IDLE, 1) if any(s.multiplexed for s in connections) else MCP_POOL_SIZE
+        idle = [s for s in connections if s.in_flight == 0]
+        while len(connections) > limit and idle:
+            surplus = idle.pop()
+            connections.remove(surplus)
+            self._spawn(surplus.close())
+    
+    async def _refill(self, server_name: str):
+        """Keep MCP_POOL_MIN_IDLE connections ready to take a new prompt"""
+        while True:
+            connections = self._prune(server_name)
+            available = sum(1 for s in connections if s.multiplexed or s.in_flight == 0)
+            if available + self._opening[server_name] >= MCP_POOL_MIN_IDLE:
+                return
+            if len(connections) + self._opening[server_name] >= MCP_POOL_SIZE:
+                return
+            try:
+                await self._open_session(server_name)
+            except Exception as e:
+                logger.warning(f"Could not pre-warm connection to {server_name}: {e}")
+                return
+    
+    def _record_configure(self, server_name: str, stage: str, seconds: Optional[float]):
+        """
+        Record how long a server took to report session_configured
+        
+        Args:
+            stage: "handshake" (after initialize) or "prompt" (after tools/call)
+            seconds: Elapsed time, or None if it never arrived
+        """
+        stats = self._configure_metrics[server_name][stage]
+        if seconds is None:
+            stats["timeouts"] += 1
+            return
+        ms = seconds * 1000
+        stats["configured"] += 1
+        stats["total_ms"] += ms
+        stats["last_ms"] = round(ms, 1)
+        stats["max_ms"] = round(max(stats["max_ms"], ms), 1)
+    
+    def configure_stats(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Per-server session_configured timing, for monitoring"""
+        report = {}
+        for name, stages in self._configure_metrics.items():
+            report[name] = {}
+            for stage, stats in stages.items():
+                count = stats["configured"]
+                report[name][stage] = {
+                    "configured": count,
+                    "timeouts": stats["timeouts"],
+                    "avg_ms": round(stats["total_ms"] / count, 1) if count else None,
+                    "last_ms": stats["last_ms"],
+                    "max_ms": stats["max_ms"] if count else None
+                }
+        return report
+    
+    def _spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def warm_up(self):
+        """Pre-open MCP_POOL_MIN_IDLE connections to every server"""
+        await asyncio.gather(*(self._refill(name) for name in self.servers))
+        warm = {name: len(connections) for name, connections in self._connections.items()}
+        logger.info(f"MCP connections warmed: {warm}")
+        
+        # Populate the tool catalogue while we're at it
+        results = await asyncio.gather(
+            *(self.list_tools(name) for name in self.servers),
+            return_exceptions=True
+        )
+        for name, result in zip(self.servers, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Could not load tool catalogue for {name}: {result}")
     
     async def send_prompt(self, server_name: str, prompt: str, 
                           stream: bool = False, return_on_first_result: bool = False) -> AsyncGenerator[Dict[str, Any], None]:
@@ -151,366 +663,337 @@ class MCPSSEClient:
             "id": prompt_request_id
         }
         
+        session = None
+        acquire: Optional[asyncio.Future] = None
+        completed = False
+        
+        # Heartbeat tracking for long operations (including the wait for a connection)
+        operation_start = datetime.now()
+        last_event_time = datetime.now()
+        heartbeat_interval = MCP_HEARTBEAT_INTERVAL  # seconds of silence before a heartbeat
+        heartbeat_messages = [
+            "Still processing your request...",
+            "Working on it...",
+            "This is taking a bit longer, please wait...",
+            "Still analyzing...",
+            "Processing continues..."
+        ]
+        heartbeat_count = 0
+        last_heartbeat_time = operation_start
+        
+        def heartbeat() -> Dict[str, Any]:
+            nonlocal heartbeat_count, last_heartbeat_time
+            last_heartbeat_time = datetime.now()
+            chunk = {
+                "type": "heartbeat",
+                "content": heartbeat_messages[heartbeat_count % len(heartbeat_messages)],
+                "elapsed": (last_heartbeat_time - operation_start).total_seconds()
+            }
+            heartbeat_count += 1
+            return chunk
+        
         try:
-            # Establish SSE connection and get endpoint
-            sse_url = f"{server.url}/sse"
+            # Use a warm, already-initialized connection, heartbeating while one is opened or freed up
+            acquire = asyncio.ensure_future(self._acquire_session(server_name, prompt_request_id))
+            while stream and heartbeat_interval > 0 and not acquire.done():
+                done, _ = await asyncio.wait({acquire}, timeout=heartbeat_interval)
+                if not done:
+                    yield heartbeat()
+            session = await acquire
+            queue = session.queue(prompt_request_id)
             
-            async with aconnect_sse(
-                self.client,
-                "GET",
-                sse_url,
-                headers={"Accept": "text/event-stream"}
-            ) as event_source:
-                
-                # Variable to store endpoint URL
-                endpoint_url = None
-                init_request_id = None
-                prompt_sent = False
-                task_complete = False
-                collected_result = None
-                
-                # Track Codex event states
-                session_configured = False
-                
-                # Multi-stage response collection
-                reasoning_chunks = []
-                message_chunks = []
-                has_tool_error = False
-                task_complete = False
-                collected_result = None
-                
-                # Heartbeat tracking for long operations
-                operation_start = datetime.now()
-                last_event_time = datetime.now()
-                heartbeat_interval = 5.0  # seconds
-                heartbeat_messages = [
-                    "Still processing your request...",
-                    "Working on it...",
-                    "This is taking a bit longer, please wait...",
-                    "Still analyzing...",
-                    "Processing continues..."
-                ]
-                heartbeat_count = 0
-                result_received_time = None  # Track when we receive a result
-                # Removed timeout - keep connection open for multi-turn conversation
-                
-                logger.info(f"Connecting to SSE endpoint: {sse_url}")
-                
-                # Keep reading events indefinitely for multi-turn conversation
-                try:
-                    async for event in event_source.aiter_sse():
+            # Multi-stage response collection
+            reasoning_chunks = []
+            message_chunks = []
+            has_tool_error = False
+            task_complete = False
+            collected_result = None
+            result_received_time = None  # Track when we receive a result
+            
+            # Send the actual request
+            logger.info(f"Sending prompt request with ID {prompt_request_id}")
+            response = await session.post(request)
+            
+            if response.status_code not in (200, 202):
+                logger.error(f"Failed to send prompt: {response.status_code} - {response.text}")
+                completed = True
+                yield {
+                    "type": "error",
+                    "content": f"Failed to send message: {response.status_code} - {response.text}"
+                }
+                return
+            
+            logger.info(f"Prompt sent successfully, status: {response.status_code}")
+            prompt_sent_at = asyncio.get_event_loop().time()
+            
+            # Keep reading routed messages until we have a result
+            try:
+                while True:
+                    if stream and heartbeat_interval > 0:
+                        # Wake up for a heartbeat if the server goes quiet
+                        last_activity = max(last_event_time, last_heartbeat_time)
+                        wait = heartbeat_interval - (datetime.now() - last_activity).total_seconds()
+                        try:
+                            data = await asyncio.wait_for(queue.get(), timeout=max(wait, 0))
+                        except asyncio.TimeoutError:
+                            yield heartbeat()
+                            continue
+                    else:
+                        data = await queue.get()
+                    
+                    if data is None:
+                        # Session's SSE stream closed
+                        break
+                    
+                    # Update last event time when we receive real events
+                    last_event_time = datetime.now()
+                    
+                    logger.debug(f"Parsed message data: method={data.get('method')}, id={data.get('id')}, has_result={'result' in data}")
+                    
+                    # Handle Codex-specific events
+                    if "method" in data:
+                        method = data.get("method")
+                        
+                        # Handle Codex events (session_configured, agent_message_delta, task_complete)
+                        if method == "codex/event":
+                            params = data.get("params", {})
+                            # The event structure has msg containing the actual event
+                            msg = params.get("msg", {})
+                            event_type = msg.get("type")
                             
-                            # Update last event time when we receive real events
-                            last_event_time = datetime.now()
+                            logger.info(f"Codex event: {event_type}")
+                            logger.debug(f"Full event params: {json.dumps(params, default=str)[:500]}")
                             
-                            # Check if we should send a heartbeat (only in streaming mode)
-                            # This is a simplified approach - heartbeats will only be sent between events
-                            # For true async heartbeats, we'd need a more complex implementation
+                            if event_type == "session_configured":
+                                logger.info("Codex session configured")
+                                self._record_configure(server_name, "prompt", asyncio.get_event_loop().time() - prompt_sent_at)
                             
-                            logger.debug(f"Received SSE event: type={event.event}, data_len={len(event.data) if event.data else 0}")
+                            elif event_type == "agent_message_delta":
+                                # Delta is in msg.delta not params.content
+                                content = msg.get("delta", "")
+                                message_chunks.append(content)
+                                if stream and content:
+                                    yield {
+                                        "type": "chunk",
+                                        "content": content
+                                    }
                             
-                            # Check for endpoint event
-                            if event.event == "endpoint" and not endpoint_url:
-                                # The endpoint is sent directly as plain text, not JSON
-                                endpoint_path = event.data
-                                endpoint_url = urljoin(server.url, endpoint_path)
-                                logger.info(f"Got endpoint URL: {endpoint_url}")
-                                
-                                # Track initialization request ID
-                                init_request_id = self._get_next_id()
-                                
-                                # Initialize the session first  
-                                if not await self._initialize_session_with_id(endpoint_url, init_request_id):
+                            elif event_type == "agent_reasoning_delta":
+                                # Stream reasoning for TTS
+                                delta = msg.get("delta", "")
+                                reasoning_chunks.append(delta)
+                                if stream and delta:
                                     yield {
-                                        "type": "error",
-                                        "content": "Failed to initialize MCP session"
+                                        "type": "reasoning",
+                                        "content": delta,
+                                        "is_final": False
                                     }
-                                    return
-                                
-                                logger.info("MCP session initialized successfully")
-                                
-                                # Wait for session_configured event instead of fixed sleep
-                                if not session_configured:
-                                    config_timeout = asyncio.create_task(asyncio.sleep(2.0))
-                                    start_time = asyncio.get_event_loop().time()
-                                    while not session_configured and not config_timeout.done():
-                                        await asyncio.sleep(0.1)
-                                        if asyncio.get_event_loop().time() - start_time > 2.0:
-                                            break
-                                
-                                # Send the actual request
-                                logger.info(f"Sending prompt request with ID {prompt_request_id}")
-                                response = await self.client.post(
-                                    endpoint_url,
-                                    json=request,
-                                    headers={"Content-Type": "application/json"}
-                                )
-                                
-                                prompt_sent = True
-                                
-                                if response.status_code not in (200, 202):
-                                    logger.error(f"Failed to send prompt: {response.status_code} - {response.text}")
+                            
+                            elif event_type == "exec_command_begin":
+                                # Notify user about command execution
+                                command = msg.get("command", "a command")
+                                if stream:
+                                    yield {
+                                        "type": "status",
+                                        "content": f"Executing: {command[:50]}...",  # Truncate long commands
+                                        "is_final": False
+                                    }
+                            
+                            elif event_type == "exec_command_end":
+                                # Notify completion but don't send raw output
+                                exit_code = msg.get("exit_code", 0)
+                                if stream and exit_code != 0:
                                     yield {
-                                        "type": "error",
-                                        "content": f"Failed to send message: {response.status_code} - {response.text}"
+                                        "type": "status",
+                                        "content": "Command completed with errors",
+                                        "is_final": False
+                                    }
+                            
+                            elif event_type == "task_complete":
+                                logger.info(f"Processing task_complete event from codex/event")
+                                task_complete = True
+                                # Extract the final response from last_agent_message
+                                last_agent_message = msg.get("last_agent_message", "")
+                                if last_agent_message:
+                                    logger.info(f"Got task_complete with response: {last_agent_message[:100]}...")
+                                    # Format the response as expected by the bridge
+                                    collected_result = {
+                                        "content": [{"type": "text", "text": last_agent_message}],
+                                        "isError": False
+                                    }
+                                    
+                                    # Immediately return when we have both task_complete and result
+                                    logger.info("Task complete with result from codex/event, returning immediately")
+                                    completed = True
+                                    yield {
+                                        "type": "result",
+                                        "content": collected_result
                                     }
                                     return
-                                
-                                logger.info(f"Prompt sent successfully, status: {response.status_code}")
+                                else:
+                                    logger.warning("task_complete received but no last_agent_message")
+                        
+                        # Handle new schema events (method matches event type)
+                        elif method == "session_configured":
+                            logger.info("Codex session configured (new schema)")
+                            self._record_configure(server_name, "prompt", asyncio.get_event_loop().time() - prompt_sent_at)
+                        
+                        # Handle converted notification events from gateway
+                        elif method.startswith("notifications/"):
+                            params = data.get("params", {})
+                            event_type = params.get("type", "")
                             
-                            # Check for message events (responses)
-                            elif prompt_sent and (event.event == "message" or (event.event is None and event.data)):
-                                try:
-                                    data = json.loads(event.data)
+                            if event_type == "agent_message_delta":
+                                delta = params.get("delta", "")
+                                message_chunks.append(delta)
+                                if stream and delta:
+                                    yield {
+                                        "type": "message",
+                                        "content": delta
+                                    }
                             
-                                    logger.debug(f"Parsed message data: method={data.get('method')}, id={data.get('id')}, has_result={'result' in data}")
+                            elif event_type in ["agent_reasoning_delta", "agent_reasoning_raw_content_delta"]:
+                                delta = params.get("delta", "")
+                                reasoning_chunks.append(delta)
+                                if stream and delta:
+                                    yield {
+                                        "type": "reasoning",
+                                        "content": delta
+                                    }
                             
-                                    # Handle Codex-specific events
-                                    if "method" in data:
-                                        method = data.get("method")
-                                
-                                        # Handle Codex events (session_configured, agent_message_delta, task_complete)
-                                        if method == "codex/event":
-                                            params = data.get("params", {})
-                                            # The event structure has msg containing the actual event
-                                            msg = params.get("msg", {})
-                                            event_type = msg.get("type")
-                                    
-                                            logger.info(f"Codex event: {event_type}")
-                                            logger.debug(f"Full event params: {json.dumps(params, default=str)[:500]}")
-                                    
-                                            if event_type == "session_configured":
-                                                session_configured = True
-                                                logger.info("Codex session configured")
-                                    
-                                            elif event_type == "agent_message_delta":
-                                                # Delta is in msg.delta not params.content
-                                                content = msg.get("delta", "")
-                                                message_chunks.append(content)
-                                                if stream and content:
-                                                    yield {
-                                                        "type": "chunk",
-                                                        "content": content
-                                                    }
-                                    
-                                            elif event_type == "agent_reasoning_delta":
-                                                # Stream reasoning for TTS
-                                                delta = msg.get("delta", "")
-                                                reasoning_chunks.append(delta)
-                                                if stream and delta:
-                                                    yield {
-                                                        "type": "reasoning",
-                                                        "content": delta,
-                                                        "is_final": False
-                                                    }
-                                    
-                                            elif event_type == "exec_command_begin":
-                                                # Notify user about command execution
-                                                command = msg.get("command", "a command")
-                                                if stream:
-                                                    yield {
-                                                        "type": "status",
-                                                        "content": f"Executing: {command[:50]}...",  # Truncate long commands
-                                                        "is_final": False
-                                                    }
-                                    
-                                            elif event_type == "exec_command_end":
-                                                # Notify completion but don't send raw output
-                                                exit_code = msg.get("exit_code", 0)
-                                                if stream and exit_code != 0:
-                                                    yield {
-                                                        "type": "status",
-                                                        "content": "Command completed with errors",
-                                                        "is_final": False
-                                                    }
-                                    
-                                            elif event_type == "task_complete":
-                                                logger.info(f"Processing task_complete event from codex/event")
-                                                task_complete = True
-                                                # Extract the final response from last_agent_message
-                                                last_agent_message = msg.get("last_agent_message", "")
-                                                if last_agent_message:
-                                                    logger.info(f"Got task_complete with response: {last_agent_message[:100]}...")
-                                                    # Format the response as expected by the bridge
-                                                    collected_result = {
-                                                        "content": [{"type": "text", "text": last_agent_message}],
-                                                        "isError": False
-                                                    }
-                                            
-                                                    # Immediately return when we have both task_complete and result
-                                                    logger.info("Task complete with result from codex/event, returning immediately")
-                                                    yield {
-                                                        "type": "result",
-                                                        "content": collected_result
-                                                    }
-                                                    return
-                                                else:
-                                                    logger.warning("task_complete received but no last_agent_message")
-                                
-                                        # Handle new schema events (method matches event type)
-                                        elif method == "session_configured":
-                                            session_configured = True
-                                            logger.info("Codex session configured (new schema)")
-                                
-                                        # Handle converted notification events from gateway
-                                        elif method.startswith("notifications/"):
-                                            params = data.get("params", {})
-                                            event_type = params.get("type", "")
-                                    
-                                            if event_type == "agent_message_delta":
-                                                delta = params.get("delta", "")
-                                                message_chunks.append(delta)
-                                                if stream and delta:
-                                                    yield {
-                                                        "type": "message",
-                                                        "content": delta
-                                                    }
-                                    
-                                            elif event_type in ["agent_reasoning_delta", "agent_reasoning_raw_content_delta"]:
-                                                delta = params.get("delta", "")
-                                                reasoning_chunks.append(delta)
-                                                if stream and delta:
-                                                    yield {
-                                                        "type": "reasoning",
-                                                        "content": delta
-                                                    }
-                                    
-                                            elif event_type == "mcp_tool_call_end":
-                                                # Check for tool errors to track retry behavior
-                                                result = params.get("result", {})
-                                                if isinstance(result, dict) and "error" in result:
-                                                    has_tool_error = True
-                                                    logger.info("Tool call error detected, waiting for Codex to retry...")
-                                
-                                        elif method == "task_complete":
-                                            task_complete = True
-                                            # Combine all collected responses
-                                            final_message = "".join(message_chunks) if message_chunks else data.get("params", {}).get("last_agent_message", "")
-                                            collected_result = {
-                                                "reasoning": "".join(reasoning_chunks),
-                                                "message": final_message,
-                                                "had_retry": has_tool_error
-                                            }
-                                            logger.info(f"Task complete with {len(reasoning_chunks)} reasoning chunks and {len(message_chunks)} message chunks")
-                                    
-                                            # Immediately return when we have task_complete with result
-                                            logger.info("Task complete (standard format), returning immediately")
-                                            yield {
-                                                "type": "result",
-                                                "content": collected_result
-                                            }
-                                            return
-                                
-                                        # Handle streaming notifications
-                                        elif method == "notifications/message":
-                                            params = data.get("params", {})
-                                    
-                                            # Check for reasoning content (both from MCP standard and our conversion)
-                                            if params.get("logger") == "reasoning" or \
-                                               (isinstance(params.get("data"), dict) and params.get("data", {}).get("type") == "reasoning"):
-                                                if stream:
-                                                    content = params.get("data", {}).get("content", "") if isinstance(params.get("data"), dict) else str(params.get("data", ""))
-                                                    yield {
-                                                        "type": "reasoning",
-                                                        "content": content
-                                                    }
-                                            # Check for regular text chunks
-                                            elif params.get("data", {}).get("type") == "text":
-                                                if stream:
-                                                    yield {
-                                                        "type": "chunk", 
-                                                        "content": params.get("data", {}).get("content", "")
-                                                    }
-                                            # Handle plain string data from our gateway
-                                            elif params.get("logger") == "agent" and isinstance(params.get("data"), str):
-                                                if stream:
-                                                    yield {
-                                                        "type": "chunk",
-                                                        "content": params.get("data", "")
-                                                    }
+                            elif event_type == "mcp_tool_call_end":
+                                # Check for tool errors to track retry behavior
+                                result = params.get("result", {})
+                                if isinstance(result, dict) and "error" in result:
+                                    has_tool_error = True
+                                    logger.info("Tool call error detected, waiting for Codex to retry...")
+                        
+                        elif method == "task_complete":
+                            task_complete = True
+                            # Combine all collected responses
+                            final_message = "".join(message_chunks) if message_chunks else data.get("params", {}).get("last_agent_message", "")
+                            collected_result = {
+                                "reasoning": "".join(reasoning_chunks),
+                                "message": final_message,
+                                "had_retry": has_tool_error
+                            }
+                            logger.info(f"Task complete with {len(reasoning_chunks)} reasoning chunks and {len(message_chunks)} message chunks")
                             
-                                    # Check message ID to match with our prompt request
-                                    message_id = data.get("id")
+                            # Immediately return when we have task_complete with result
+                            logger.info("Task complete (standard format), returning immediately")
+                            completed = True
+                            yield {
+                                "type": "result",
+                                "content": collected_result
+                            }
+                            return
+                        
+                        # Handle streaming notifications
+                        elif method == "notifications/message":
+                            params = data.get("params", {})
                             
-                                    # Process responses matching our prompt request ID
-                                    if message_id == prompt_request_id:
-                                        # Handle different message types
-                                        if "result" in data:
-                                            logger.info(f"Got result for request {prompt_request_id}")
-                                            # Store result
-                                            if collected_result is None:
-                                                collected_result = data["result"]
-                                                result_received_time = datetime.now()  # Track when we got the result
-                                    
-                                            # Check if this contains human-readable text (not raw tool result)
-                                            is_human_readable = False
-                                            human_text = None
-                                    
-                                            if isinstance(collected_result, dict):
-                                                # Agent messages have content[].text structure
-                                                if "content" in collected_result and isinstance(collected_result["content"], list):
-                                                    for item in collected_result["content"]:
-                                                        if isinstance(item, dict) and "text" in item and item["text"]:
-                                                            # This is human-readable text
-                                                            is_human_readable = True
-                                                            human_text = item["text"]
-                                                            break
-                                                # Note: Removed error handling - errors are NOT for TTS
-                                    
-                                            # If we have human-readable content, yield immediately as final result
-                                            if is_human_readable and human_text:
-                                                logger.info("Got human-readable result, yielding immediately as final result")
-                                                yield {
-                                                    "type": "result",
-                                                    "content": collected_result
-                                                }
-                                                # Return immediately for fast response
-                                                return
-                                            else:
-                                                # Tool result or error - wait for more events
-                                                logger.info("Got tool result/error, continuing to await human-readable response")
-                                    
-                                        elif "error" in data:
-                                            logger.error(f"Got error for request {prompt_request_id}: {data['error']}")
-                                            yield {
-                                                "type": "error",
-                                                "content": data.get("error", {}).get("message", str(data["error"]))
-                                            }
-                                            return
+                            # Check for reasoning content (both from MCP standard and our conversion)
+                            if params.get("logger") == "reasoning" or \
+                               (isinstance(params.get("data"), dict) and params.get("data", {}).get("type") == "reasoning"):
+                                if stream:
+                                    content = params.get("data", {}).get("content", "") if isinstance(params.get("data"), dict) else str(params.get("data", ""))
+                                    yield {
+                                        "type": "reasoning",
+                                        "content": content
+                                    }
+                            # Check for regular text chunks
+                            elif params.get("data", {}).get("type") == "text":
+                                if stream:
+                                    yield {
+                                        "type": "chunk", 
+                                        "content": params.get("data", {}).get("content", "")
+                                    }
+                            # Handle plain string data from our gateway
+                            elif params.get("logger") == "agent" and isinstance(params.get("data"), str):
+                                if stream:
+                                    yield {
+                                        "type": "chunk",
+                                        "content": params.get("data", "")
+                                    }
+                    
+                    # Check message ID to match with our prompt request
+                    message_id = data.get("id")
+                    
+                    # Process responses matching our prompt request ID
+                    if message_id == prompt_request_id:
+                        # Handle different message types
+                        if "result" in data:
+                            logger.info(f"Got result for request {prompt_request_id}")
+                            # Store result
+                            if collected_result is None:
+                                collected_result = data["result"]
+                                result_received_time = datetime.now()  # Track when we got the result
                             
-                                    # Handle streaming chunks (may not have ID)
-                                    elif stream and prompt_sent and not message_id:
-                                        # Fallback for simple chunk format
-                                        if "chunk" in data:
-                                            yield {
-                                                "type": "chunk",
-                                                "content": data["chunk"]
-                                            }
-                                    
-                                except json.JSONDecodeError as e:
-                                    logger.warning(f"Invalid JSON from {server_name}: {e} - Data: {event.data[:100]}")
-                                    continue
+                            # Check if this contains human-readable text (not raw tool result)
+                            is_human_readable = False
+                            human_text = None
                             
-                            # Removed task_complete and timeout checks - results are yielded immediately above
-                
-                except asyncio.CancelledError:
-                    logger.info("SSE reading cancelled (session terminated)")
-                    return
-                
-                # If we exit the loop without a result, that's an error
-                logger.error(f"SSE connection closed without receiving a complete response")
-                if collected_result is not None:
-                    # We have a result but didn't get task_complete - yield it anyway
-                    yield {
-                        "type": "result",
-                        "content": collected_result
-                    }
-                else:
-                    yield {
-                        "type": "error",
-                        "content": "Connection closed without receiving a response"
-                    }
+                            if isinstance(collected_result, dict):
+                                # Agent messages have content[].text structure
+                                if "content" in collected_result and isinstance(collected_result["content"], list):
+                                    for item in collected_result["content"]:
+                                        if isinstance(item, dict) and "text" in item and item["text"]:
+                                            # This is human-readable text
+                                            is_human_readable = True
+                                            human_text = item["text"]
+                                            break
+                                # Note: Removed error handling - errors are NOT for TTS
                             
+                            # If we have human-readable content, yield immediately as final result
+                            if is_human_readable and human_text:
+                                logger.info("Got human-readable result, yielding immediately as final result")
+                                completed = True
+                                yield {
+                                    "type": "result",
+                                    "content": collected_result
+                                }
+                                # Return immediately for fast response
+                                return
+                            else:
+                                # Tool result or error - wait for more events
+                                logger.info("Got tool result/error, continuing to await human-readable response")
+                        
+                        elif "error" in data:
+                            logger.error(f"Got error for request {prompt_request_id}: {data['error']}")
+                            completed = True
+                            yield {
+                                "type": "error",
+                                "content": data.get("error", {}).get("message", str(data["error"]))
+                            }
+                            return
+                    
+                    # Handle streaming chunks (may not have ID)
+                    elif stream and not message_id:
+                        # Fallback for simple chunk format
+                        if "chunk" in data:
+                            yield {
+                                "type": "chunk",
+                                "content": data["chunk"]
+                            }
+            
+            except asyncio.CancelledError:
+                logger.info("SSE reading cancelled (session terminated)")
+                return
+            
+            # If we exit the loop without a result, that's an error
+            logger.error(f"SSE connection closed without receiving a complete response")
+            if collected_result is not None:
+                # We have a result but didn't get task_complete - yield it anyway
+                yield {
+                    "type": "result",
+                    "content": collected_result
+                }
+            else:
+                yield {
+                    "type": "error",
+                    "content": "Connection closed without receiving a response"
+                }
+        
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error from {server_name}: {e.response.status_code}")
             yield {
@@ -518,11 +1001,11 @@ class MCPSSEClient:
                 "content": f"HTTP {e.response.status_code}: {e.response.text}"
             }
             
-        except asyncio.TimeoutError:
-            logger.error(f"Timeout waiting for response from {server_name}")
+        except asyncio.TimeoutError as e:
+            logger.error(f"Timeout waiting for response from {server_name}: {e}")
             yield {
                 "type": "error",
-                "content": "Request timed out waiting for response"
+                "content": str(e) or "Request timed out waiting for response"
             }
             
         except Exception as e:
@@ -531,123 +1014,27 @@ class MCPSSEClient:
                 "type": "error", 
                 "content": str(e)
             }
-    
-    async def _initialize_session_with_id(self, endpoint_url: str, init_id: int) -> bool:
-        """
-        Send initialization sequence to MCP server with specific ID
-        
-        Returns:
-            True if initialization succeeded
-        """
-        try:
-            # Send initialize request
-            init_request = {
-                "jsonrpc": "2.0",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "0.1.0",
-                    "capabilities": {
-                        "tools": {},
-                        "prompts": {},
-                        "resources": {}
-                    },
-                    "clientInfo": {
-                        "name": "bridge-client",
-                        "version": "1.0.0"
-                    }
-                },
-                "id": init_id
-            }
-            
-            response = await self.client.post(
-                endpoint_url,
-                json=init_request,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code not in (200, 202):
-                return False
-            
-            # Send initialized notification
-            initialized_notif = {
-                "jsonrpc": "2.0",
-                "method": "notifications/initialized",
-                "params": {}
-            }
-            
-            response = await self.client.post(
-                endpoint_url,
-                json=initialized_notif,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            return response.status_code in (200, 202)
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize session: {e}")
-            return False
-    
-    async def _initialize_session(self, endpoint_url: str) -> bool:
-        """
-        Send initialization sequence to MCP server
         
-        Returns:
-            True if initialization succeeded
-        """
-        try:
-            # Send initialize request
-            init_request = {
-                "jsonrpc": "2.0",
-                "method": "initialize",
-                "params": {
-                    "protocolVersion": "0.1.0",
-                    "capabilities": {
-                        "tools": {},
-                        "prompts": {},
-                        "resources": {}
-                    },
-                    "clientInfo": {
-                        "name": "bridge-client",
-                        "version": "1.0.0"
-                    }
-                },
-                "id": self._get_next_id()
-            }
-            
-            response = await self.client.post(
-                endpoint_url,
-                json=init_request,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code not in (200, 202):
-                return False
-            
-            # Send initialized notification
-            initialized_notif = {
-                "jsonrpc": "2.0",
-                "method": "notifications/initialized",
-                "params": {}
-            }
-            
-            response = await self.client.post(
-                endpoint_url,
-                json=initialized_notif,
-                headers={"Content-Type": "application/json"}
-            )
-            
-            return response.status_code in (200, 202)
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize session: {e}")
-            return False
+        finally:
+            if acquire is not None and session is None:
+                # Stopped while still waiting for a connection
+                if not acquire.done():
+                    acquire.cancel()
+                elif not acquire.cancelled() and acquire.exception() is None:
+                    session = acquire.result()
+            if session is not None:
+                self._release_session(session, prompt_request_id, completed)
     
-    async def list_tools(self, server_name: str) -> Dict[str, Any]:
+    async def list_tools(self, server_name: str, refresh: bool = False) -> Dict[str, Any]:
         """
         List available tools on an MCP server
         
+        The catalogue is cached per server until the server sends
+        notifications/tools/list_changed or a refresh is requested.
+        
         Args:
             server_name: Name of the server
+            refresh: Bypass the cache and fetch from the server
             
         Returns:
             List of available tools
@@ -655,119 +1042,139 @@ class MCPSSEClient:
         if server_name not in self.servers:
             raise ValueError(f"Unknown server: {server_name}")
         
-        server = self.servers[server_name]
-        
-        # Build tools/list request
-        request = {
-            "jsonrpc": "2.0",
-            "method": "tools/list",
-            "params": {},  # Empty params object required
-            "id": self._get_next_id()
-        }
+        if not refresh and server_name in self._tools:
+            return self._tools[server_name]
         
         logger.info(f"Listing tools for {server_name} server")
         
         try:
-            sse_url = f"{server.url}/sse"
+            session = await self._acquire_session(server_name)
+            data = await session.request("tools/list", {})  # Empty params object required
+            
+            if "error" in data:
+                raise Exception(f"Error listing tools: {data['error']}")
+            
+            result = data.get("result", {})
+            logger.info(f"Got {len(result.get('tools', []))} tools from {server_name}")
+            self._tools[server_name] = result
+            self._tools_fetched_at[server_name] = datetime.now()
+            return result
             
-            async with aconnect_sse(
-                self.client,
-                "GET",
-                sse_url,
-                headers={"Accept": "text/event-stream"}
-            ) as event_source:
-                
-                endpoint_url = None
-                initialized = False
-                request_sent = False
-                
-                async for event in event_source.aiter_sse():
-                    
-                    logger.debug(f"List tools SSE event: type={event.event}")
-                    
-                    # Get endpoint and initialize
-                    if event.event == "endpoint" and not endpoint_url:
-                        # The endpoint is sent directly as plain text, not JSON
-                        endpoint_path = event.data
-                        endpoint_url = urljoin(server.url, endpoint_path)
-                        logger.info(f"Got endpoint for tools list: {endpoint_url}")
-                        
-                        # Initialize the session
-                        if await self._initialize_session(endpoint_url):
-                            initialized = True
-                            logger.info("Session initialized for tools list")
-                            # Wait a bit for initialization to complete
-                            await asyncio.sleep(0.5)
-                            
-                            # Send the actual request
-                            response = await self.client.post(
-                                endpoint_url,
-                                json=request,
-                                headers={"Content-Type": "application/json"}
-                            )
-                            request_sent = True
-                            
-                            if response.status_code not in (200, 202):
-                                raise Exception(f"Failed to send message: {response.status_code}")
-                            logger.info(f"Tools list request sent, status: {response.status_code}")
-                        else:
-                            raise Exception("Failed to initialize session")
-                    
-                    # Read response
-                    elif request_sent and (event.event == "message" or (event.event is None and event.data)):
-                        try:
-                            data = json.loads(event.data)
-                            
-                            # Skip initialization responses
-                            if "result" in data:
-                                # Check if this is the tools response (not init response)
-                                result = data["result"]
-                                if "tools" in result:
-                                    logger.info(f"Got {len(result['tools'])} tools from {server_name}")
-                                    return result
-                                # Otherwise might be init response, skip
-                            elif "error" in data:
-                                raise Exception(f"Error listing tools: {data['error']}")
-                                
-                        except json.JSONDecodeError:
-                            logger.warning(f"Invalid JSON in tools list response")
-                            continue
-                            
         except Exception as e:
             logger.error(f"Error listing tools on {server_name}: {e}", exc_info=True)
             raise
     
-    async def health_check(self) -> Dict[str, str]:
-        """Check health of all MCP servers"""
-        status = {}
+    def invalidate_tools(self, server_name: Optional[str] = None):
+        """Drop the cached tool catalogue for one server (or all)"""
+        names = [server_name] if server_name else list(self.servers)
+        for name in names:
+            self._tools.pop(name, None)
+            self._tools_fetched_at.pop(name, None)
+    
+    async def reload_tools(self, server_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Refetch the tool catalogue for one server (or all)
         
+        Returns:
+            Mapping of server name to tools/list result, for servers that answered
+        """
+        names = [server_name] if server_name else list(self.servers)
+        results = await asyncio.gather(
+            *(self.list_tools(name, refresh=True) for name in names),
+            return_exceptions=True
+        )
+        return {name: result for name, result in zip(names, results)
+                if not isinstance(result, Exception)}
+    
+    def tool_catalogue(self) -> Dict[str, Dict[str, Any]]:
+        """Cached tool names per server, without contacting any server"""
+        catalogue = {}
+        for name in self.servers:
+            if name in self._tools:
+                catalogue[name] = {
+                    "tools": [tool.get("name") for tool in self._tools[name].get("tools", [])],
+                    "fetched_at": self._tools_fetched_at[name].isoformat()
+                }
+            else:
+                catalogue[name] = {"tools": None, "fetched_at": None}
+        return catalogue
+    
+    async def _check_server(self, server_name: str) -> str:
+        """Probe a single server, bounded by MCP_HEALTH_TIMEOUT"""
+        try:
+            logger.info(f"Checking health of {server_name} server")
+            # Try to list tools as a health check
+            result = await asyncio.wait_for(self.list_tools(server_name, refresh=True), MCP_HEALTH_TIMEOUT)
+            if result and "tools" in result:
+                tool_count = len(result['tools'])
+                logger.info(f"{server_name}: healthy with {tool_count} tools")
+                return f"healthy ({tool_count} tools)"
+            logger.warning(f"{server_name}: unhealthy - no tools found")
+            return "unhealthy (no tools)"
+        except asyncio.TimeoutError:
+            logger.error(f"{server_name}: health check timeout")
+            return "timeout"
+        except Exception as e:
+            logger.error(f"{server_name}: health check error - {e}")
+            return f"error: {str(e)[:50]}"
+    
+    async def refresh_health(self) -> Dict[str, str]:
+        """Probe all servers concurrently and update the cached status"""
         logger.info("Starting health check for all MCP servers")
+        names = list(self.servers.keys())
+        results = await asyncio.gather(*(self._check_server(name) for name in names))
+        self._health = dict(zip(names, results))
+        self._health_checked_at = asyncio.get_event_loop().time()
+        logger.info(f"Health check complete: {self._health}")
+        return dict(self._health)
+    
+    def _refresh_health_once(self) -> asyncio.Task:
+        """Start a health refresh unless one is already running"""
+        if self._health_task is None or self._health_task.done():
+            self._health_task = self._spawn(self.refresh_health())
+        return self._health_task
+    
+    async def health_check(self, max_age: float = MCP_HEALTH_TTL) -> Dict[str, str]:
+        """
+        Health of all MCP servers
+        
+        Served from cache while it is younger than max_age. A stale cache is
+        still returned immediately while a refresh runs in the background;
+        only the very first call waits for the probes.
+        """
+        if self._health_checked_at is None:
+            return dict(await asyncio.shield(self._refresh_health_once()))
         
-        for server_name in self.servers.keys():
+        age = asyncio.get_event_loop().time() - self._health_checked_at
+        if age > max_age:
+            self._refresh_health_once()
+        return dict(self._health)
+    
+    async def _monitor_health(self, interval: float):
+        """Refresh cached health status every interval seconds"""
+        while True:
             try:
-                logger.info(f"Checking health of {server_name} server")
-                # Try to list tools as a health check
-                result = await self.list_tools(server_name)
-                if result and "tools" in result:
-                    tool_count = len(result['tools'])
-                    status[server_name] = f"healthy ({tool_count} tools)"
-                    logger.info(f"{server_name}: healthy with {tool_count} tools")
-                else:
-                    status[server_name] = "unhealthy (no tools)"
-                    logger.warning(f"{server_name}: unhealthy - no tools found")
-            except asyncio.TimeoutError:
-                status[server_name] = "timeout"
-                logger.error(f"{server_name}: health check timeout")
+                await self._refresh_health_once()
             except Exception as e:
-                status[server_name] = f"error: {str(e)[:50]}"
-                logger.error(f"{server_name}: health check error - {e}")
-        
-        logger.info(f"Health check complete: {status}")
-        return status
+                logger.error(f"Background health check failed: {e}")
+            await asyncio.sleep(interval)
+    
+    def start_health_monitor(self, interval: float = MCP_HEALTH_TTL):
+        """Keep the health cache fresh from a background task"""
+        if self._health_monitor is None or self._health_monitor.done():
+            self._health_monitor = self._spawn(self._monitor_health(interval))
     
     async def close(self):
-        """Close the HTTP client"""
+        """Close pooled sessions and the HTTP client"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        for connections in self._connections.values():
+            for session in connections:
+                await session.close()
+            connections.clear()
         await self.client.aclose()
+        for client in self._uds_clients.values():
+            await client.aclose()
 
 # Singleton instance
 _client_instance: Optional[MCPSSEClient] = None
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Repetition Detector
+Detects and trims the repeated phrases Whisper hallucinates on long or noisy audio
+"""
+
+import gzip
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Transcripts compressing better than this are treated as repetitive
+COMPRESSION_RATIO_THRESHOLD = 3.5
+
+# Phrase lengths checked for repeats, longest first
+NGRAM_SIZES = (8, 7, 6, 5, 4, 3)
+
+# Only transcripts longer than this many words are truncated
+MIN_WORDS = 10
+
+# Polynomial rolling hash over word ids, modulo a Mersenne prime
+_HASH_BASE = 1_000_003
+_HASH_MOD = (1 << 61) - 1
+
+def compression_ratio(text: str) -> float:
+    """Ratio of UTF-8 size to gzip size (high for repetitive text)"""
+    text_bytes = text.encode('utf-8')
+    return len(text_bytes) / len(gzip.compress(text_bytes))
+
+def dedupe_sentences(text: str) -> str:
+    """Drop sentences that repeat the one immediately before them"""
+    sentences = text.replace('?', '?|').replace('.', '.|').replace('!', '!|').split('|')
+    unique_sentences: List[str] = []
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if sentence and (not unique_sentences or sentence != unique_sentences[-1]):
+            unique_sentences.append(sentence)
+    return ' '.join(unique_sentences)
+
+def find_repeated_ngram(words: List[str], n: int) -> Optional[int]:
+    """
+    Find the first n-gram that occurs again later without overlapping
+    
+    Every window of n words is hashed in O(1) with a rolling hash, so the
+    whole scan is O(len(words)) regardless of n.
+    
+    Args:
+        words: Transcript split into words
+        n: Phrase length in words
+    
+    Returns:
+        Start index i of the earliest n-gram that reappears at some
+        j >= i + n, or None
+    """
+    count = len(words) - n + 1
+    if n <= 0 or count < 2:
+        return None
+    
+    ids: Dict[str, int] = {}
+    tokens = [ids.setdefault(word, len(ids) + 1) for word in words]
+    
+    top = pow(_HASH_BASE, n - 1, _HASH_MOD)
+    hashes = [0] * count
+    h = 0
+    for k in range(n):
+        h = (h * _HASH_BASE + tokens[k]) % _HASH_MOD
+    hashes[0] = h
+    for i in range(1, count):
+        h = ((h - tokens[i - 1] * top) * _HASH_BASE + tokens[i + n - 1]) % _HASH_MOD
+        hashes[i] = h
+    
+    # Last start of every window hash; a window repeats if its hash
+    # starts again at or after its own end
+    last_start: Dict[int, int] = {}
+    for i, h in enumerate(hashes):
+        last_start[h] = i
+    
+    for i, h in enumerate(hashes):
+        j = last_start[h]
+        if j >= i + n and tokens[i:i + n] == tokens[j:j + n]:
+            return i
+    return None
+
+def truncate_repetition(text: str) -> Tuple[str, Optional[Tuple[int, int]]]:
+    """
+    Cut the transcript after the first phrase that is repeated later
+    
+    Longer phrases are tried first, so a repeated sentence is cut at
+    its first full occurrence rather than at a common 3-word phrase.
+    
+    Returns:
+        (text, (n, i)) if an n-gram starting at word i was truncated,
+        otherwise (text, None)
+    """
+    words = text.split()
+    if len(words) <= MIN_WORDS:
+        return text, None
+    
+    for n in NGRAM_SIZES:
+        i = find_repeated_ngram(words, n)
+        if i is not None:
+            return ' '.join(words[:i + n]), (n, i)
+    return text, None
+
+def fix_repetitions(text: str, threshold: float = COMPRESSION_RATIO_THRESHOLD) -> str:
+    """
+    Post-processing guard for Whisper transcripts
+    
+    Transcripts that compress suspiciously well have consecutive duplicate
+    sentences removed and are then truncated at the first repeated phrase.
+    
+    Args:
+        text: Transcript
+        threshold: Compression ratio above which the transcript is cleaned
+    
+    Returns:
+        Cleaned transcript (unchanged if it does not look repetitive)
+    """
+    if not text:
+        return text
+    
+    ratio = compression_ratio(text)
+    if ratio <= threshold:
+        return text
+    
+    logger.warning(f"High compression ratio detected: {ratio:.2f}, applying repetition fix")
+    fixed, truncated = truncate_repetition(dedupe_sentences(text))
+    if truncated is not None:
+        n, i = truncated
+        logger.warning(f"Truncated repetitive {n}-gram at position {i}")
+    
+    logger.info(f"Fixed repetition: {len(text)} -> {len(fixed)} chars")
+    return fixed
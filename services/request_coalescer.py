@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Request Coalescer
+Shares one in-flight MCP stream between identical concurrent prompts
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+from typing import Dict, Any, Optional, AsyncGenerator, AsyncIterator, Callable, List
+
+from response_cache import _TRANSIENT_CHUNKS
+
+logger = logging.getLogger(__name__)
+
+# Set BRIDGE_COALESCE_REQUESTS=0 to give every request its own Codex run
+COALESCE_ENABLED = os.environ.get("BRIDGE_COALESCE_REQUESTS", "1") != "0"
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalize a prompt so trivially different phrasings share a key"""
+    text = " ".join(prompt.lower().split())
+    return text.rstrip(" .!?")
+
+def coalesce_key(server: str, prompt: str, context: Optional[str] = None) -> str:
+    """
+    Build the single-flight key for a request
+    
+    The session manager renders the context before recording the user's
+    turn, but a client retrying the same prompt finds the original attempt's
+    turn already at the end of its context. Trailing copies of the current
+    prompt are dropped from the context before hashing, so retries coalesce
+    with the original.
+    """
+    normalized = normalize_prompt(prompt)
+    
+    lines = (context or "").rstrip("\n").split("\n")
+    while lines and lines[-1].startswith("User: ") and normalize_prompt(lines[-1][6:]) == normalized:
+        lines.pop()
+    context_hash = hashlib.sha1("\n".join(lines).encode("utf-8")).hexdigest()
+    
+    return f"{server}:{hashlib.sha1(normalized.encode('utf-8')).hexdigest()}:{context_hash}"
+
+class InFlightRequest:
+    """
+    One upstream MCP stream fanned out to any number of subscribers
+    
+    Chunks are buffered for the life of the request, so a subscriber that
+    joins late replays the answer from the start. Heartbeats and status
+    updates it missed are not replayed, since they describe the run as it was.
+    """
+    
+    def __init__(self, key: str, source: AsyncIterator[Dict[str, Any]],
+                 on_done: Callable[[str], None]):
+        self.key = key
+        self.chunks: List[Dict[str, Any]] = []
+        self.done = False
+        self.subscribers = 0
+        self._source = source
+        self._on_done = on_done
+        self._changed = asyncio.Condition()
+        self._task = asyncio.create_task(self._pump())
+    
+    async def _pump(self):
+        """Read the upstream stream to the end, whether or not anyone is listening"""
+        try:
+            async for chunk in self._source:
+                async with self._changed:
+                    self.chunks.append(chunk)
+                    self._changed.notify_all()
+        except Exception as e:
+            logger.error(f"Coalesced request {self.key} failed: {e}")
+            async with self._changed:
+                self.chunks.append({"type": "error", "content": str(e)})
+        finally:
+            self._on_done(self.key)
+            async with self._changed:
+                self.done = True
+                self._changed.notify_all()
+    
+    async def subscribe(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield every chunk of the upstream stream, from the beginning"""
+        self.subscribers += 1
+        try:
+            index = 0
+            live_from = len(self.chunks)  # Chunks before this are replayed
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(lambda: index < len(self.chunks) or self.done)
+                    pending = self.chunks[index:]
+                    finished = self.done
+                start = index
+                index += len(pending)
+                
+                for position, chunk in enumerate(pending, start):
+                    if position < live_from and chunk.get("type") in _TRANSIENT_CHUNKS:
+                        continue
+                    yield chunk
+                if finished and index >= len(self.chunks):
+                    return
+        finally:
+            self.subscribers -= 1
+
+class RequestCoalescer:
+    """Single-flight layer keyed by server, normalized prompt and context"""
+    
+    def __init__(self):
+        self.in_flight: Dict[str, InFlightRequest] = {}
+        self.started = 0
+        self.coalesced = 0
+    
+    def _finished(self, key: str):
+        self.in_flight.pop(key, None)
+    
+    def subscribe(self, server: str, prompt: str, context: Optional[str],
+                  start: Callable[[], AsyncIterator[Dict[str, Any]]]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Join an identical in-flight request, or start a new one
+        
+        Args:
+            server: Target MCP server
+            prompt: The user's prompt (without context)
+            context: Conversation context sent along with the prompt
+            start: Called to open the upstream stream if nothing is in flight
+        
+        Returns:
+            Async generator of response chunks
+        """
+        if not COALESCE_ENABLED:
+            return start()
+        
+        key = coalesce_key(server, prompt, context)
+        request = self.in_flight.get(key)
+        
+        if request is None:
+            request = InFlightRequest(key, start(), self._finished)
+            self.in_flight[key] = request
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalescing duplicate prompt for {server} onto in-flight request "
+                        f"({request.subscribers} already waiting)")
+        
+        return request.subscribe()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "enabled": COALESCE_ENABLED,
+            "in_flight": len(self.in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
+
+# Singleton instance
+_coalescer: Optional[RequestCoalescer] = None
+
+def get_coalescer() -> RequestCoalescer:
+    """Get or create the singleton request coalescer"""
+    global _coalescer
+    if _coalescer is None:
+        _coalescer = RequestCoalescer()
+    return _coalescer
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Response Cache
+Replays recent specialist answers for repeated, idempotent queries
+"""
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, AsyncGenerator, AsyncIterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of cached responses across all agents (LRU beyond that)
+RESPONSE_CACHE_SIZE = int(os.environ.get("BRIDGE_RESPONSE_CACHE_SIZE", "256"))
+
+# Chunks that describe the live run rather than the answer
+_TRANSIENT_CHUNKS = {"heartbeat", "status"}
+
+class ResponseCache:
+    """
+    LRU cache of MCP response streams with per-entry expiry
+    
+    Entries hold the chunk sequence of a successful run, so a hit is
+    replayed through exactly the same path as a live response.
+    """
+    
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached chunks for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, chunks = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return chunks
+    
+    def put(self, key: str, chunks: List[Dict[str, Any]], ttl: float):
+        """Store chunks for ttl seconds, evicting the least recently used"""
+        self._entries[key] = (time.monotonic() + ttl, chunks)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def replay(self, chunks: List[Dict[str, Any]]) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yield cached chunks as if they came from the server"""
+        for chunk in chunks:
+            yield dict(chunk)
+    
+    async def record(self, key: str, ttl: float,
+                     source: AsyncIterator[Dict[str, Any]]) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Pass a live stream through, caching it if it ends in a result
+        
+        Streams that error out, or are abandoned before their result, are
+        not cached.
+        """
+        chunks: Optional[List[Dict[str, Any]]] = []
+        async for chunk in source:
+            chunk_type = chunk.get("type")
+            if chunk_type == "error":
+                chunks = None
+            elif chunks is not None and chunk_type not in _TRANSIENT_CHUNKS:
+                chunks.append(chunk)
+                if chunk_type == "result":
+                    self.put(key, chunks, ttl)
+                    logger.info(f"Cached response for {ttl:.0f}s ({len(chunks)} chunks)")
+            yield chunk
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the singleton response cache"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
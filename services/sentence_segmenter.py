@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Streaming Sentence Segmenter
+Groups streamed text deltas into sentence-sized units for TTS
+
+Standard library only, so the Windows voice client can use the same file.
+"""
+
+import os
+import re
+import time
+from typing import Callable, List, Optional
+
+# Sentences shorter than this are merged with the next one
+TTS_MIN_CHARS = int(os.environ.get("TTS_MIN_CHARS", "24"))
+
+# Text without a sentence boundary is split (at a clause or word break) beyond this
+TTS_MAX_CHARS = int(os.environ.get("TTS_MAX_CHARS", "240"))
+
+# Pending text is released after this long even without a boundary
+TTS_MAX_DELAY_MS = int(os.environ.get("TTS_MAX_DELAY_MS", "1500"))
+
+# Words that end with a period without ending the sentence (lowercase, final period omitted)
+ABBREVIATIONS = frozenset({
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "approx",
+    "e.g", "i.e", "cf", "a.m", "p.m", "u.s", "u.k", "inc", "ltd", "corp", "dept",
+    "fig", "vol", "ch", "sec", "jan", "feb", "mar", "apr", "jun", "jul", "aug",
+    "sep", "sept", "oct", "nov", "dec"
+})
+
+# Terminal punctuation (plus closing quotes/brackets) followed by whitespace or the end of the text
+_SENTENCE_END = re.compile(r'[.!?…]+["\'”’)\]]*(?=\s|$)|\n+')
+
+# Places to split an over-long sentence, best first
+_SOFT_BREAKS = ("; ", ": ", " - ", ", ", " ")
+
+class SentenceSegmenter:
+    """
+    Buffers text deltas and releases complete sentences
+    
+    push() returns the sentences completed by a delta, poll() releases text
+    that has waited past the latency deadline, and flush() returns whatever
+    is left at the end of a stream.
+    """
+    
+    def __init__(self,
+                 min_chars: int = TTS_MIN_CHARS,
+                 max_chars: int = TTS_MAX_CHARS,
+                 max_delay: float = TTS_MAX_DELAY_MS / 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self.clock = clock
+        self._buffer = ""
+        self._pending_since: Optional[float] = None
+    
+    def push(self, text: str) -> List[str]:
+        """Add a delta and return any sentences it completes"""
+        if not text:
+            return []
+        if not self._buffer.strip():
+            self._pending_since = self.clock()
+        self._buffer += text
+        
+        segments = self._split_sentences()
+        while len(self._buffer) > self.max_chars:
+            segments.append(self._take(self._soft_break(self.max_chars)))
+        return self._emitted(segments)
+    
+    def deadline(self) -> Optional[float]:
+        """Clock time at which pending text should be released, or None if nothing is pending"""
+        if self._pending_since is None:
+            return None
+        return self._pending_since + self.max_delay
+    
+    def poll(self) -> List[str]:
+        """Release pending text if it has waited past the deadline"""
+        deadline = self.deadline()
+        if deadline is None or self.clock() < deadline:
+            return []
+        
+        # Hold back a word that may still be arriving
+        cut = self._buffer.rstrip().rfind(" ")
+        if cut <= 0 or self._buffer[-1].isspace():
+            cut = len(self._buffer)
+        return self._emitted([self._take(cut)])
+    
+    def flush(self) -> List[str]:
+        """Return all remaining text"""
+        return self._emitted([self._take(len(self._buffer))])
+    
+    def _split_sentences(self) -> List[str]:
+        """Cut every sentence of at least min_chars off the front of the buffer"""
+        segments = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            end = match.end()
+            if not self._is_boundary(match.start(), end):
+                continue
+            if len(self._buffer[start:end].strip()) < self.min_chars:
+                continue  # Too short to speak on its own, merge with the next sentence
+            segments.append(self._buffer[start:end])
+            start = end
+        self._buffer = self._buffer[start:]
+        return segments
+    
+    def _is_boundary(self, start: int, end: int) -> bool:
+        """Whether the punctuation at buffer[start:end] really ends a sentence"""
+        mark = self._buffer[start:end]
+        if mark[0] == "\n":
+            return True
+        if mark[0] != "." or mark.startswith(".."):
+            return True  # ! ? and ellipses are never abbreviations
+        
+        word = self._buffer[:start].rsplit(None, 1)[-1] if self._buffer[:start].strip() else ""
+        word = word.lstrip("\"'(“‘[")
+        if word.lower() in ABBREVIATIONS:
+            return False
+        if len(word) == 1 and word.isupper():
+            return False  # An initial, as in "J. Smith"
+        if end == len(self._buffer) and (word[-1:].isdigit() or len(word) == 1):
+            return False  # Could be a decimal or "e.g." whose rest has not arrived yet
+        return True
+    
+    def _soft_break(self, limit: int) -> int:
+        """Best position at or before limit to split an over-long sentence"""
+        for separator in _SOFT_BREAKS:
+            position = self._buffer.rfind(separator, 0, limit)
+            if position > limit // 2 or (separator == " " and position > 0):
+                return position + len(separator)
+        return limit
+    
+    def _take(self, length: int) -> str:
+        """Remove and return the first length characters of the buffer"""
+        segment, self._buffer = self._buffer[:length], self._buffer[length:]
+        return segment
+    
+    def _emitted(self, segments: List[str]) -> List[str]:
+        """Clean up released segments and restart the deadline for what is left"""
+        if segments:
+            self._pending_since = self.clock() if self._buffer.strip() else None
+        if not self._buffer.strip():
+            self._pending_since = None
+        return [segment.strip() for segment in segments if segment.strip()]
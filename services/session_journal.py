@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Session Journal
+Append-only JSON lines log of session changes, compacted into a snapshot as it grows
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Journal location (the old whole-file JSON store is migrated on first start)
+SESSION_JOURNAL = os.environ.get("SESSION_JOURNAL", "/tmp/ai_sessions.jsonl")
+
+# Compact once the journal holds this many records and is mostly superseded history
+SESSION_COMPACT_MIN_RECORDS = int(os.environ.get("SESSION_COMPACT_MIN_RECORDS", "1000"))
+SESSION_COMPACT_RATIO = float(os.environ.get("SESSION_COMPACT_RATIO", "2.0"))
+
+def encode(record: Dict[str, Any]) -> str:
+    """One journal line"""
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+class SessionJournal:
+    """
+    Append-only log of session records
+    
+    Each line is one of:
+      {"op": "session", "session": {...}}  header upsert; replaces the turns too if it has "context"
+      {"op": "turn", "session_id": ..., "turn": {...}}
+      {"op": "delete", "session_id": ...}
+    
+    A change costs one appended line. compact() rewrites the file as one
+    "session" record per live session once superseded records pile up.
+    """
+    
+    def __init__(self, path: Path = Path(SESSION_JOURNAL)):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = None
+    
+    def exists(self) -> bool:
+        return self.path.exists()
+    
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Replay the journal into session dicts (same shape as the old JSON store)"""
+        sessions: Dict[str, Dict[str, Any]] = {}
+        self.records = 0
+        if not self.path.exists():
+            return sessions
+        
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-append leaves at most one torn line at the end
+                    logger.warning(f"Skipping unreadable journal line {line_number}")
+                    continue
+                self.records += 1
+                apply_record(sessions, record)
+        
+        return sessions
+    
+    def append(self, record: Dict[str, Any]):
+        """Append one record"""
+        self.append_many([record])
+    
+    def append_many(self, records: List[Dict[str, Any]]):
+        """Append records in a single write"""
+        data = "".join(encode(record) for record in records)
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+                if self._torn_tail():
+                    data = "\n" + data  # Don't extend a line torn by a crash
+            self._file.write(data)
+            self._file.flush()
+            self.records += len(records)
+    
+    def sync(self):
+        """fsync appended records to disk"""
+        with self._lock:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+    
+    def needs_compaction(self, live_records: int) -> bool:
+        """Whether the journal has grown well past the records needed to rebuild the live sessions"""
+        return self.records >= SESSION_COMPACT_MIN_RECORDS and \
+            self.records > live_records * SESSION_COMPACT_RATIO
+    
+    def offset(self) -> int:
+        """Current end of the journal, to pass to compact() alongside a snapshot"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+            return self.path.stat().st_size if self.path.exists() else 0
+    
+    def compact(self, snapshot: List[Dict[str, Any]], since: int):
+        """
+        Replace the journal with a snapshot
+        
+        Safe to run in a worker thread: records appended after offset()
+        was taken for the snapshot are carried over to the new file.
+        
+        Args:
+            snapshot: One "session" record (with context) per live session
+            since: Journal offset at which snapshot was taken
+        """
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for record in snapshot:
+                tmp.write(encode(record))
+            
+            with self._lock:
+                if self._file is not None:
+                    self._file.flush()
+                tail = ""
+                if self.path.exists():
+                    with open(self.path, "rb") as old:
+                        old.seek(since)
+                        tail = old.read().decode("utf-8")
+                tmp.write(tail)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                
+                os.replace(tmp_path, self.path)
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                previous = self.records
+                self.records = len(snapshot) + tail.count("\n")
+        
+        logger.info(f"Compacted session journal from {previous} to {self.records} records")
+    
+    def _torn_tail(self) -> bool:
+        """Whether the file ends part way through a line"""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return False
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+    
+    def close(self):
+        """Close the append handle"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def apply_record(sessions: Dict[str, Dict[str, Any]], record: Dict[str, Any]):
+    """Apply one journal record to session dicts"""
+    op = record.get("op")
+    if op == "session":
+        header = record["session"]
+        session = sessions.get(header["session_id"])
+        if session is None or "context" in header:
+            sessions[header["session_id"]] = {**header, "context": list(header.get("context", []))}
+        else:
+            session.update(header)
+    elif op == "turn":
+        session = sessions.get(record["session_id"])
+        if session is not None:
+            turn = record["turn"]
+            session["context"].append(turn)
+            session["last_active"] = max(session["last_active"], turn["timestamp"])
+    elif op == "delete":
+        sessions.pop(record["session_id"], None)
+    else:
+        logger.warning(f"Unknown journal record: {op}")
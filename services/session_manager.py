@@ -13,6 +13,10 @@ from dataclasses import dataclass, field, asdict
 from pathlib import Path
 import uuid
 
+from session_store import SessionStore, create_session_store, SESSION_RETENTION_DAYS
+from session_writer import SessionWriter
+from context_builder import ContextWindow
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -40,6 +44,7 @@ class ConversationSession:
     metadata: Dict[str, Any] = field(default_factory=dict)
     created_at: datetime = field(default_factory=datetime.now)
     last_active: datetime = field(default_factory=datetime.now)
+    window: Optional[ContextWindow] = field(default=None, init=False, repr=False, compare=False)
     
     def add_turn(self, role: str, content: str, agent: str, voice: Optional[str] = None):
         """Add a conversation turn"""
@@ -52,6 +57,29 @@ class ConversationSession:
         )
         self.context.append(turn)
         self.last_active = datetime.now()
+        if self.window is not None:
+            self._add_to_window(turn)
+    
+    def _add_to_window(self, turn: ConversationTurn):
+        role_label = "User" if turn.role == "user" else f"{turn.agent.title()}"
+        self.window.add(role_label, turn.content, is_user=turn.role == "user")
+    
+    def get_prompt_context(self) -> str:
+        """Recent context within the current agent's token budget, maintained incrementally"""
+        from config.voice_personalities import get_context_token_budget
+        
+        budget = get_context_token_budget(self.current_agent)
+        if self.window is None or self.window.budget_tokens != budget:
+            # Built once per load, handoff or context merge; then updated per turn
+            self.window = ContextWindow(budget)
+            for turn in self.context:
+                self._add_to_window(turn)
+        return self.window.render()
+    
+    def reset_context(self, context: List[ConversationTurn]):
+        """Replace the turns (and the cached window)"""
+        self.context = context
+        self.window = None
     
     def get_context_string(self, max_turns: int = 10) -> str:
         """Get recent context as a formatted string"""
@@ -71,85 +99,118 @@ class ConversationSession:
 class SessionManager:
     """Manages all conversation sessions"""
     
-    def __init__(self, session_timeout_minutes: int = 30):
+    def __init__(self, session_timeout_minutes: int = 30, store: Optional[SessionStore] = None):
+        # Sessions in use; the store holds the rest and is read on demand
         self.sessions: Dict[str, ConversationSession] = {}
         self.session_timeout = session_timeout_minutes
-        self.session_file = Path("/tmp/ai_sessions.json")
-        self._load_sessions()
+        self.session_file = Path("/tmp/ai_sessions.json")  # Legacy whole-file store
+        self.store = store or create_session_store()
+        self._migrate_legacy_file()
+        
+        # Changes are written in batches by a background task, off the event loop
+        self.writer = SessionWriter(self.store)
+        self.writer.start()
         
         # Start cleanup task
         asyncio.create_task(self._cleanup_expired_sessions())
     
-    def _load_sessions(self):
-        """Load sessions from persistent storage"""
-        if self.session_file.exists():
-            try:
-                with open(self.session_file, 'r') as f:
-                    data = json.load(f)
-                    # Reconstruct sessions from JSON
-                    for session_id, session_data in data.items():
-                        # Convert timestamps
-                        session_data['created_at'] = datetime.fromisoformat(session_data['created_at'])
-                        session_data['last_active'] = datetime.fromisoformat(session_data['last_active'])
-                        
-                        # Reconstruct conversation turns
-                        turns = []
-                        for turn_data in session_data.get('context', []):
-                            turn_data['timestamp'] = datetime.fromisoformat(turn_data['timestamp'])
-                            turns.append(ConversationTurn(**turn_data))
-                        session_data['context'] = turns
-                        
-                        # Create session
-                        session = ConversationSession(**session_data)
-                        if not session.is_expired(self.session_timeout):
-                            self.sessions[session_id] = session
-                            
-                logger.info(f"Loaded {len(self.sessions)} active sessions")
-            except Exception as e:
-                logger.error(f"Error loading sessions: {e}")
-    
-    def _save_sessions(self):
-        """Save sessions to persistent storage"""
+    def _migrate_legacy_file(self):
+        """Import sessions from the old whole-file JSON store into an empty store"""
+        if not self.session_file.exists() or self.store.count():
+            return
+        
         try:
-            data = {}
-            for session_id, session in self.sessions.items():
-                # Convert to JSON-serializable format
-                session_dict = asdict(session)
-                session_dict['created_at'] = session.created_at.isoformat()
-                session_dict['last_active'] = session.last_active.isoformat()
-                
-                # Convert conversation turns
-                for turn in session_dict['context']:
-                    turn['timestamp'] = turn['timestamp'].isoformat()
-                
-                data[session_id] = session_dict
+            with open(self.session_file, 'r') as f:
+                data = json.load(f)
+            for session_data in data.values():
+                context = session_data.pop('context', [])
+                self.store.save_session(session_data, context)
             
-            with open(self.session_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
+            self.session_file.rename(self.session_file.with_name(self.session_file.name + ".migrated"))
+            logger.info(f"Migrated {len(data)} sessions from {self.session_file}")
         except Exception as e:
-            logger.error(f"Error saving sessions: {e}")
+            logger.error(f"Error migrating sessions: {e}")
+    
+    @staticmethod
+    def _session_from_dict(session_data: Dict[str, Any], turns: List[Dict[str, Any]]) -> ConversationSession:
+        """Rebuild a session from its stored header and turns"""
+        return ConversationSession(
+            session_id=session_data['session_id'],
+            channel=session_data['channel'],
+            current_agent=session_data['current_agent'],
+            voice_personality=session_data['voice_personality'],
+            context=[
+                ConversationTurn(**{**turn_data, 'timestamp': datetime.fromisoformat(turn_data['timestamp'])})
+                for turn_data in turns
+            ],
+            metadata=session_data.get('metadata', {}),
+            created_at=datetime.fromisoformat(session_data['created_at']),
+            last_active=datetime.fromisoformat(session_data['last_active'])
+        )
+    
+    @staticmethod
+    def _turn_to_dict(turn: ConversationTurn) -> Dict[str, Any]:
+        """JSON form of a turn"""
+        turn_dict = asdict(turn)
+        turn_dict['timestamp'] = turn.timestamp.isoformat()
+        return turn_dict
+    
+    @staticmethod
+    def _session_to_dict(session: ConversationSession) -> Dict[str, Any]:
+        """JSON form of a session header"""
+        return {
+            "session_id": session.session_id,
+            "channel": session.channel,
+            "current_agent": session.current_agent,
+            "voice_personality": session.voice_personality,
+            "metadata": dict(session.metadata),
+            "created_at": session.created_at.isoformat(),
+            "last_active": session.last_active.isoformat()
+        }
+    
+    def _save_session(self, session: ConversationSession, with_context: bool = False):
+        """Queue a session's header (and its turns, if they were replaced) for writing"""
+        context = [self._turn_to_dict(turn) for turn in session.context] if with_context else None
+        self.writer.save_session(self._session_to_dict(session), context)
+    
+    def _active_since(self) -> str:
+        """Oldest last_active of a session that has not expired"""
+        return (datetime.now() - timedelta(minutes=self.session_timeout)).isoformat()
+    
+    async def close(self):
+        """Write pending changes and close the store"""
+        await self.writer.close()
+        self.store.close()
     
     async def _cleanup_expired_sessions(self):
-        """Periodically clean up expired sessions"""
+        """Periodically unload expired sessions and prune the store"""
         while True:
             try:
-                await asyncio.sleep(300)  # Check every 5 minutes
-                
                 expired = []
                 for session_id, session in self.sessions.items():
                     if session.is_expired(self.session_timeout):
                         expired.append(session_id)
                 
                 for session_id in expired:
-                    logger.info(f"Removing expired session: {session_id}")
+                    logger.info(f"Unloading expired session: {session_id}")
                     del self.sessions[session_id]
                 
-                if expired:
-                    self._save_sessions()
+                # Pending writes land before anything is pruned
+                await self.writer.flush()
+                
+                # Stores that keep history hold on to sessions for the retention period
+                if self.store.keeps_history:
+                    cutoff = (datetime.now() - timedelta(days=SESSION_RETENTION_DAYS)).isoformat()
+                else:
+                    cutoff = self._active_since()
+                pruned = await self.store.prune(cutoff)
+                if pruned:
+                    logger.info(f"Removed {len(pruned)} sessions from the store")
                     
             except Exception as e:
                 logger.error(f"Error in session cleanup: {e}")
+            
+            await asyncio.sleep(300)  # Check every 5 minutes
     
     def create_session(self, session_id: Optional[str] = None, 
                       channel: str = "voice",
@@ -175,21 +236,38 @@ class SessionManager:
         )
         
         self.sessions[session_id] = session
-        self._save_sessions()
+        self._save_session(session, with_context=True)  # Drops turns of an expired session with this id
         
         logger.info(f"Created session {session_id} for {agent} on {channel}")
         return session
     
     def get_session(self, session_id: str) -> Optional[ConversationSession]:
-        """Get an existing session"""
+        """Get an existing session, loading it (and its turns) from the store if needed"""
         session = self.sessions.get(session_id)
         
+        if session is None:
+            session = self._load_session(session_id)
+        
         if session and not session.is_expired(self.session_timeout):
             session.last_active = datetime.now()
             return session
         
         return None
     
+    def _load_session(self, session_id: str) -> Optional[ConversationSession]:
+        """Read a session that has not expired from the store into memory"""
+        try:
+            header = self.store.get(session_id)
+            if header is None or header["last_active"] < self._active_since():
+                return None
+            session = self._session_from_dict(header, self.store.load_turns(session_id))
+        except Exception as e:
+            logger.error(f"Error loading session {session_id}: {e}")
+            return None
+        
+        self.sessions[session_id] = session
+        return session
+    
     def get_or_create_session(self, session_id: str, 
                              channel: str = "voice",
                              agent: str = "router") -> ConversationSession:
@@ -201,6 +279,14 @@ class SessionManager:
         
         return session
     
+    def add_turn(self, session: ConversationSession, role: str, content: str,
+                 agent: str, voice: Optional[str] = None) -> ConversationTurn:
+        """Add a turn to a session and queue it for writing"""
+        session.add_turn(role, content, agent, voice)
+        turn = session.context[-1]
+        self.writer.append_turn(session.session_id, self._turn_to_dict(turn))
+        return turn
+    
     def handoff_session(self, session_id: str, 
                        new_agent: str,
                        handoff_context: Optional[str] = None) -> Optional[ConversationSession]:
@@ -216,7 +302,7 @@ class SessionManager:
         
         # Record handoff in context
         handoff_msg = get_handoff_message(session.current_agent, new_agent)
-        session.add_turn("assistant", handoff_msg, session.current_agent, session.voice_personality)
+        self.add_turn(session, "assistant", handoff_msg, session.current_agent, session.voice_personality)
         
         # Update agent and voice
         old_agent = session.current_agent
@@ -228,10 +314,10 @@ class SessionManager:
         # Add handoff context if provided
         if handoff_context:
             intro = f"I see you need help with {handoff_context}"
-            session.add_turn("assistant", intro, new_agent, session.voice_personality)
+            self.add_turn(session, "assistant", intro, new_agent, session.voice_personality)
         
         # Save changes
-        self._save_sessions()
+        self._save_session(session)
         
         logger.info(f"Handed off session {session_id} from {old_agent} to {new_agent}")
         return session
@@ -249,15 +335,17 @@ class SessionManager:
             )
             
             # Update both sessions
-            voice_session.context = combined_context
+            voice_session.reset_context(combined_context)
             voice_session.channel = "hybrid"
             voice_session.metadata["linked_email"] = email_session_id
             
-            email_session.context = combined_context
+            email_session.reset_context(list(combined_context))
             email_session.channel = "hybrid"
             email_session.metadata["linked_voice"] = voice_session_id
             
-            self._save_sessions()
+            # Contexts were replaced wholesale, so store them in full
+            self._save_session(voice_session, with_context=True)
+            self._save_session(email_session, with_context=True)
             logger.info(f"Linked sessions: voice={voice_session_id}, email={email_session_id}")
     
     def get_session_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
@@ -267,27 +355,51 @@ class SessionManager:
         if not session:
             return None
         
+        return self._summarize(session)
+    
+    @staticmethod
+    def _summarize(session: ConversationSession, turn_count: Optional[int] = None) -> Dict[str, Any]:
+        """Summary of a session (turn_count overrides len(context) when only recent turns are loaded)"""
         return {
-            "session_id": session_id,
+            "session_id": session.session_id,
             "channel": session.channel,
             "current_agent": session.current_agent,
             "voice": session.voice_personality,
-            "turn_count": len(session.context),
+            "turn_count": len(session.context) if turn_count is None else turn_count,
             "duration_minutes": (session.last_active - session.created_at).total_seconds() / 60,
             "last_active": session.last_active.isoformat(),
             "recent_context": session.get_context_string(5)
         }
     
-    def get_active_sessions(self) -> List[Dict[str, Any]]:
-        """Get summaries of all active sessions"""
-        summaries = []
+    def get_active_sessions(self, offset: int = 0, limit: int = 50,
+                            channel: Optional[str] = None,
+                            agent: Optional[str] = None,
+                            include_expired: bool = False) -> Dict[str, Any]:
+        """Get a page of session summaries, most recently active first"""
+        headers, total = self.store.list_sessions(
+            active_since=None if include_expired else self._active_since(),
+            channel=channel,
+            agent=agent,
+            offset=offset,
+            limit=limit
+        )
         
-        for session_id in self.sessions:
-            summary = self.get_session_summary(session_id)
-            if summary:
-                summaries.append(summary)
+        summaries = []
+        for header in headers:
+            session = self.sessions.get(header["session_id"])
+            if session:
+                summaries.append(self._summarize(session))
+            else:
+                # Only the turns shown in recent_context are read
+                recent = self.store.load_turns(header["session_id"], limit=5)
+                summaries.append(self._summarize(self._session_from_dict(header, recent), header["turn_count"]))
         
-        return summaries
+        return {
+            "sessions": summaries,
+            "total": total,
+            "offset": offset,
+            "limit": limit
+        }
 
 # Singleton instance
 _session_manager: Optional[SessionManager] = None
@@ -299,6 +411,13 @@ def get_session_manager() -> SessionManager:
         _session_manager = SessionManager()
     return _session_manager
 
+async def close_session_manager():
+    """Flush and close the session store if the manager was started"""
+    global _session_manager
+    if _session_manager is not None:
+        await _session_manager.close()
+        _session_manager = None
+
 # Helper functions for bridge integration
 async def process_with_session(session_id: str, 
                               prompt: str,
@@ -308,11 +427,11 @@ async def process_with_session(session_id: str,
     manager = get_session_manager()
     session = manager.get_or_create_session(session_id, channel, agent)
     
-    # Add user turn
-    session.add_turn("user", prompt, agent)
+    # Context for MCP call: earlier turns only, the prompt itself is sent as the current request
+    context = session.get_prompt_context()
     
-    # Get context for MCP call
-    context = session.get_context_string()
+    # Add user turn
+    manager.add_turn(session, "user", prompt, agent)
     
     # Return session info for MCP call
     return {
@@ -328,5 +447,4 @@ async def record_response(session_id: str, response: str, agent: str):
     session = manager.get_session(session_id)
     
     if session:
-        session.add_turn("assistant", response, agent, session.voice_personality)
-        manager._save_sessions()
\ No newline at end of file
+        manager.add_turn(session, "assistant", response, agent, session.voice_personality)
\ No newline at end of file
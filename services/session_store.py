@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Session Storage Backends
+Persists conversation sessions for the session manager: a JSON lines journal or SQLite
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from session_journal import SessionJournal, apply_record
+
+logger = logging.getLogger(__name__)
+
+# Backend: "jsonl" (journal, all sessions in memory) or "sqlite" (indexed, turns loaded on demand)
+SESSION_STORE = os.environ.get("SESSION_STORE", "jsonl")
+
+# SQLite database location
+SESSION_DB = os.environ.get("SESSION_DB", "/tmp/ai_sessions.db")
+
+# Days of inactive history SQLite keeps (the journal only keeps sessions that have not expired)
+SESSION_RETENTION_DAYS = float(os.environ.get("SESSION_RETENTION_DAYS", "30"))
+
+class SessionStore(ABC):
+    """
+    Storage interface used by SessionManager
+    
+    Sessions are exchanged as JSON-ready dicts: a header (session_id,
+    channel, current_agent, voice_personality, metadata, created_at,
+    last_active) and, separately, a list of turn dicts. Timestamps are
+    ISO strings, so they also sort as text.
+    """
+    
+    # Whether sessions outlive their expiry (and are only pruned after the retention period)
+    keeps_history = False
+    
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Header of a session plus its turn_count, or None"""
+    
+    @abstractmethod
+    def load_turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Turns of a session in order, or only the last limit of them"""
+    
+    @abstractmethod
+    def save_session(self, header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None):
+        """Insert or update a session header; replace its turns if context is given"""
+    
+    @abstractmethod
+    def append_turn(self, session_id: str, turn: Dict[str, Any]):
+        """Add one turn to a session"""
+    
+    def write_batch(self, batch: List[Any]):
+        """
+        Apply queued changes durably (called from a worker thread)
+        
+        Args:
+            batch: SessionChanges in the order they were queued
+        """
+        for changes in batch:
+            if changes.header is not None:
+                self.save_session(changes.header, changes.context)
+            for turn in changes.turns:
+                self.append_turn(changes.session_id, turn)
+    
+    @abstractmethod
+    def delete(self, session_ids: List[str]):
+        """Remove sessions and their turns"""
+    
+    @abstractmethod
+    def list_sessions(self, active_since: Optional[str] = None,
+                      channel: Optional[str] = None,
+                      agent: Optional[str] = None,
+                      offset: int = 0,
+                      limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Page of session headers (with turn_count), most recently active first
+        
+        Returns:
+            The page and the total number of matching sessions
+        """
+    
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored sessions"""
+    
+    @abstractmethod
+    async def prune(self, before: str) -> List[str]:
+        """Remove sessions inactive since before and return their ids"""
+    
+    def close(self):
+        """Release files and connections"""
+
+class JournalSessionStore(SessionStore):
+    """
+    Sessions held in memory and persisted to an append-only journal
+    
+    The whole journal is replayed at startup, so this suits the default
+    setup where sessions are dropped once they expire.
+    """
+    
+    def __init__(self, journal: Optional[SessionJournal] = None):
+        self.journal = journal or SessionJournal()
+        self._sessions = self.journal.load()
+        self._lock = threading.Lock()  # Batches are applied from a worker thread
+        logger.info(f"Replayed {self.journal.records} journal records into {len(self._sessions)} sessions")
+    
+    def _write(self, records: List[Dict[str, Any]], sync: bool = False):
+        if not records:
+            return
+        # Memory and journal change together, so a compaction snapshot never has a record twice
+        with self._lock:
+            for record in records:
+                apply_record(self._sessions, record)
+            self.journal.append_many(records)
+        if sync:
+            self.journal.sync()
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            return self._header(session)
+    
+    @staticmethod
+    def _header(session: Dict[str, Any]) -> Dict[str, Any]:
+        header = {key: value for key, value in session.items() if key != "context"}
+        header["turn_count"] = len(session["context"])
+        return header
+    
+    def load_turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            turns = session["context"]
+            return list(turns[-limit:] if limit else turns)
+    
+    @staticmethod
+    def _session_record(header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        session = dict(header)
+        if context is not None:
+            session["context"] = list(context)
+        return {"op": "session", "session": session}
+    
+    def save_session(self, header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None):
+        self._write([self._session_record(header, context)])
+    
+    def append_turn(self, session_id: str, turn: Dict[str, Any]):
+        self._write([{"op": "turn", "session_id": session_id, "turn": turn}])
+    
+    def write_batch(self, batch: List[Any]):
+        """Append the whole batch in one write and fsync it"""
+        records = []
+        for changes in batch:
+            if changes.header is not None:
+                records.append(self._session_record(changes.header, changes.context))
+            records.extend({"op": "turn", "session_id": changes.session_id, "turn": turn} for turn in changes.turns)
+        self._write(records, sync=True)
+    
+    def delete(self, session_ids: List[str]):
+        self._write([{"op": "delete", "session_id": session_id} for session_id in session_ids])
+    
+    def list_sessions(self, active_since: Optional[str] = None,
+                      channel: Optional[str] = None,
+                      agent: Optional[str] = None,
+                      offset: int = 0,
+                      limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        with self._lock:
+            matches = [
+                session for session in self._sessions.values()
+                if (active_since is None or session["last_active"] >= active_since)
+                and (channel is None or session["channel"] == channel)
+                and (agent is None or session["current_agent"] == agent)
+            ]
+            matches.sort(key=lambda session: session["last_active"], reverse=True)
+            return [self._header(session) for session in matches[offset:offset + limit]], len(matches)
+    
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+    
+    async def prune(self, before: str) -> List[str]:
+        with self._lock:
+            expired = [session_id for session_id, session in self._sessions.items() if session["last_active"] < before]
+        await asyncio.to_thread(self.delete, expired)
+        await self.compact()
+        return expired
+    
+    async def compact(self):
+        """Rewrite the journal as a snapshot if it is mostly superseded records"""
+        with self._lock:
+            live_records = sum(1 + len(session["context"]) for session in self._sessions.values())
+            if not self.journal.needs_compaction(live_records):
+                return
+            
+            # Snapshot now, write in a thread; later appends are carried over
+            snapshot = [
+                {"op": "session", "session": {**session, "context": list(session["context"])}}
+                for session in self._sessions.values()
+            ]
+            since = self.journal.offset()
+        try:
+            await asyncio.to_thread(self.journal.compact, snapshot, since)
+        except Exception as e:
+            logger.error(f"Error compacting session journal: {e}")
+    
+    def close(self):
+        self.journal.close()
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite database (WAL mode)
+    
+    Nothing is loaded at startup: headers are looked up by primary key,
+    turns are read per session when it is used, and listings page through
+    indexes on last_active, channel and agent. Reads go through their own
+    read-only connection, so they never wait behind a write batch's fsync.
+    """
+    
+    keeps_history = True
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            channel TEXT NOT NULL,
+            current_agent TEXT NOT NULL,
+            voice_personality TEXT,
+            metadata TEXT NOT NULL DEFAULT '{}',
+            created_at TEXT NOT NULL,
+            last_active TEXT NOT NULL,
+            turn_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            agent TEXT NOT NULL,
+            voice_used TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_last_active ON sessions (last_active);
+        CREATE INDEX IF NOT EXISTS idx_sessions_channel ON sessions (channel, last_active);
+        CREATE INDEX IF NOT EXISTS idx_sessions_agent ON sessions (current_agent, last_active);
+        CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_id, id);
+    """
+    
+    HEADER_COLUMNS = ("session_id", "channel", "current_agent", "voice_personality",
+                      "metadata", "created_at", "last_active", "turn_count")
+    
+    TURN_COLUMNS = ("timestamp", "role", "content", "agent", "voice_used")
+    
+    def __init__(self, path: str = SESSION_DB):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")  # fsync each commit; writes arrive in batches
+        self._conn.executescript(self.SCHEMA)
+        
+        # WAL readers see the last commit without blocking on the writer
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True,
+                                       check_same_thread=False)
+        logger.info(f"Session database at {self.path} ({self.count()} sessions)")
+    
+    def _header(self, row: tuple) -> Dict[str, Any]:
+        header = dict(zip(self.HEADER_COLUMNS, row))
+        header["metadata"] = json.loads(header["metadata"])
+        return header
+    
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._read_lock:
+            row = self._reader.execute(
+                f"SELECT {', '.join(self.HEADER_COLUMNS)} FROM sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+        return self._header(row) if row else None
+    
+    def load_turns(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        columns = ", ".join(self.TURN_COLUMNS)
+        with self._read_lock:
+            if limit:
+                rows = self._reader.execute(
+                    f"SELECT {columns} FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (session_id, limit)
+                ).fetchall()
+                rows.reverse()
+            else:
+                rows = self._reader.execute(
+                    f"SELECT {columns} FROM turns WHERE session_id = ? ORDER BY id",
+                    (session_id,)
+                ).fetchall()
+        return [dict(zip(self.TURN_COLUMNS, row)) for row in rows]
+    
+    def _turn_values(self, session_id: str, turn: Dict[str, Any]) -> tuple:
+        return (session_id,) + tuple(turn.get(column) for column in self.TURN_COLUMNS)
+    
+    def save_session(self, header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None):
+        with self._lock, self._conn:
+            self._save_session(header, context)
+    
+    def _save_session(self, header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None):
+        values = (
+            header["session_id"], header["channel"], header["current_agent"],
+            header.get("voice_personality"), json.dumps(header.get("metadata", {})),
+            header["created_at"], header["last_active"]
+        )
+        self._conn.execute(
+            """
+            INSERT INTO sessions (session_id, channel, current_agent, voice_personality,
+                                  metadata, created_at, last_active)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (session_id) DO UPDATE SET
+                channel = excluded.channel,
+                current_agent = excluded.current_agent,
+                voice_personality = excluded.voice_personality,
+                metadata = excluded.metadata,
+                created_at = excluded.created_at,
+                last_active = excluded.last_active
+            """,
+            values
+        )
+        if context is not None:
+            self._conn.execute("DELETE FROM turns WHERE session_id = ?", (header["session_id"],))
+            self._conn.executemany(
+                f"INSERT INTO turns (session_id, {', '.join(self.TURN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [self._turn_values(header["session_id"], turn) for turn in context]
+            )
+            self._conn.execute(
+                "UPDATE sessions SET turn_count = ? WHERE session_id = ?",
+                (len(context), header["session_id"])
+            )
+    
+    def append_turn(self, session_id: str, turn: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._append_turns(session_id, [turn])
+    
+    def _append_turns(self, session_id: str, turns: List[Dict[str, Any]]):
+        self._conn.executemany(
+            f"INSERT INTO turns (session_id, {', '.join(self.TURN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+            [self._turn_values(session_id, turn) for turn in turns]
+        )
+        self._conn.execute(
+            "UPDATE sessions SET turn_count = turn_count + ?, last_active = MAX(last_active, ?) WHERE session_id = ?",
+            (len(turns), max(turn["timestamp"] for turn in turns), session_id)
+        )
+    
+    def write_batch(self, batch: List[Any]):
+        """Apply the whole batch in one transaction"""
+        with self._lock, self._conn:
+            for changes in batch:
+                if changes.header is not None:
+                    self._save_session(changes.header, changes.context)
+                if changes.turns:
+                    self._append_turns(changes.session_id, changes.turns)
+    
+    def delete(self, session_ids: List[str]):
+        if not session_ids:
+            return
+        with self._lock, self._conn:
+            ids = [(session_id,) for session_id in session_ids]
+            self._conn.executemany("DELETE FROM turns WHERE session_id = ?", ids)
+            self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", ids)
+    
+    def list_sessions(self, active_since: Optional[str] = None,
+                      channel: Optional[str] = None,
+                      agent: Optional[str] = None,
+                      offset: int = 0,
+                      limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        conditions, params = [], []
+        if active_since is not None:
+            conditions.append("last_active >= ?")
+            params.append(active_since)
+        if channel is not None:
+            conditions.append("channel = ?")
+            params.append(channel)
+        if agent is not None:
+            conditions.append("current_agent = ?")
+            params.append(agent)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self._read_lock:
+            total = self._reader.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
+            rows = self._reader.execute(
+                f"SELECT {', '.join(self.HEADER_COLUMNS)} FROM sessions {where} "
+                f"ORDER BY last_active DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._header(row) for row in rows], total
+    
+    def count(self) -> int:
+        with self._read_lock:
+            return self._reader.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    async def prune(self, before: str) -> List[str]:
+        return await asyncio.to_thread(self._prune, before)
+    
+    def _prune(self, before: str) -> List[str]:
+        with self._lock, self._conn:
+            session_ids = [row[0] for row in self._conn.execute(
+                "SELECT session_id FROM sessions WHERE last_active < ?", (before,)
+            )]
+            self._conn.execute(
+                "DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_active < ?)",
+                (before,)
+            )
+            self._conn.execute("DELETE FROM sessions WHERE last_active < ?", (before,))
+        return session_ids
+    
+    def close(self):
+        with self._read_lock:
+            self._reader.close()
+        with self._lock:
+            self._conn.close()
+
+def create_session_store(backend: str = SESSION_STORE) -> SessionStore:
+    """Create the configured storage backend"""
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+    if backend != "jsonl":
+        logger.warning(f"Unknown SESSION_STORE '{backend}', using jsonl")
+    return JournalSessionStore()
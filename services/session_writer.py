@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Session Writer
+Write-behind buffer that batches session changes and persists them off the event loop
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+
+from session_store import SessionStore
+
+logger = logging.getLogger(__name__)
+
+# How long changes are collected before a batch is written
+SESSION_FLUSH_MS = int(os.environ.get("SESSION_FLUSH_MS", "500"))
+
+@dataclass
+class SessionChanges:
+    """Pending changes to one session, applied in the order header/context, then turns"""
+    session_id: str
+    header: Optional[Dict[str, Any]] = None
+    context: Optional[List[Dict[str, Any]]] = None
+    turns: List[Dict[str, Any]] = field(default_factory=list)
+
+class SessionWriter:
+    """
+    Collects session changes on the event loop and writes them in batches
+    
+    Changes are coalesced per session: only the latest header is kept, and
+    a replaced context discards turns queued before it. A background task
+    writes everything that accumulated during the debounce interval in one
+    store.write_batch() call in a worker thread, so request handlers never
+    wait on disk.
+    """
+    
+    def __init__(self, store: SessionStore, interval: float = SESSION_FLUSH_MS / 1000):
+        self.store = store
+        self.interval = interval
+        self._pending: Dict[str, SessionChanges] = {}
+        self._failed: List[SessionChanges] = []
+        self._dirty = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.changes = 0
+    
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    def _changes(self, session_id: str) -> SessionChanges:
+        changes = self._pending.get(session_id)
+        if changes is None:
+            changes = self._pending[session_id] = SessionChanges(session_id)
+        self.changes += 1
+        self._dirty.set()
+        return changes
+    
+    def save_session(self, header: Dict[str, Any], context: Optional[List[Dict[str, Any]]] = None):
+        """Queue a header update, replacing the session's turns if context is given"""
+        changes = self._changes(header["session_id"])
+        changes.header = header
+        if context is not None:
+            changes.context = context
+            changes.turns = []
+    
+    def append_turn(self, session_id: str, turn: Dict[str, Any]):
+        """Queue a new turn"""
+        self._changes(session_id).turns.append(turn)
+    
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.interval)  # Let a burst of turns pile up
+            await self.flush()
+    
+    async def flush(self):
+        """Write all pending changes now"""
+        async with self._write_lock:
+            batch = self._failed + list(self._pending.values())
+            self._pending = {}
+            self._failed = []
+            self._dirty.clear()
+            if not batch:
+                return
+            
+            try:
+                await asyncio.to_thread(self.store.write_batch, batch)
+                self.batches += 1
+            except Exception as e:
+                # Keep the batch, in order, ahead of newer changes for the next attempt
+                logger.error(f"Error writing {len(batch)} session changes, will retry: {e}")
+                self._failed = batch
+                self._dirty.set()
+    
+    async def close(self):
+        """Stop the background task and write what is left"""
+        if self._task is not None:
+            # Holding the lock means the task is not part way through a write
+            async with self._write_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "pending_sessions": len(self._pending),
+            "failed_sessions": len(self._failed),
+            "changes": self.changes,
+            "batches": self.batches,
+            "interval_ms": int(self.interval * 1000)
+        }
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+SSE Frame Encoder
+Builds server-sent event frames for streamed voice responses with minimal per-token work
+"""
+
+import json
+from typing import Dict, Any
+
+try:
+    import orjson
+    
+    def dumps(obj: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class FrameEncoder:
+    """
+    Encodes the frames of one streamed response
+    
+    Fields shared by every frame of a response (server, session, voice)
+    and the per-style extras (TTS tuning, flags) are serialized once when
+    a style is defined. Encoding a frame then only serializes its content.
+    """
+    
+    def __init__(self, **shared: Any):
+        self._shared = shared
+        self._styles: Dict[str, tuple] = {}
+    
+    def define(self, style: str, event_type: str, **fields: Any):
+        """
+        Precompute a frame style
+        
+        Args:
+            style: Name used with frame()
+            event_type: Value of the frame's "type" field
+            fields: Static fields added to every frame of this style
+        """
+        prefix = b'data: {"type":' + dumps(event_type) + b',"content":'
+        static = dumps({**self._shared, **fields})[1:-1]
+        suffix = (b"," + static if static else b"") + b"}\n\n"
+        self._styles[style] = (prefix, suffix)
+    
+    def frame(self, style: str, content: Any, **dynamic: Any) -> bytes:
+        """Encode one frame of a defined style, with optional per-frame fields"""
+        prefix, suffix = self._styles[style]
+        extra = b"".join(b"," + dumps(key) + b":" + dumps(value) for key, value in dynamic.items())
+        return prefix + dumps(content) + extra + suffix
+    
+    def event(self, payload: Dict[str, Any]) -> bytes:
+        """Encode an arbitrary payload as a frame"""
+        return b"data: " + dumps(payload) + b"\n\n"
+
+# Sent once a response is finished
+COMPLETE_FRAME = b'data: {"type":"complete"}\n\n'
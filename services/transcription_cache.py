@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Transcription Cache
+Returns recent transcriptions for byte-identical audio without re-running inference
+"""
+
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of cached transcriptions (LRU beyond that)
+TRANSCRIPTION_CACHE_SIZE = int(os.environ.get("WHISPER_CACHE_SIZE", "128"))
+
+# Seconds a transcription stays valid (0 disables the cache)
+TRANSCRIPTION_CACHE_TTL = float(os.environ.get("WHISPER_CACHE_TTL", "300"))
+
+class TranscriptionCache:
+    """
+    LRU cache of transcription results keyed by a hash of the decoded audio
+    
+    Hashing the decoded PCM rather than the upload means a retry hits even
+    if it arrives through a different endpoint or encoding.
+    """
+    
+    def __init__(self, max_entries: int = TRANSCRIPTION_CACHE_SIZE, ttl: float = TRANSCRIPTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+    
+    @staticmethod
+    def key(audio: np.ndarray, model: str) -> str:
+        """Cache key for a clip transcribed with a given model"""
+        digest = hashlib.blake2b(np.ascontiguousarray(audio).tobytes(), digest_size=16).hexdigest()
+        return f"{model}:{digest}"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, result = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(result)
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result, evicting the least recently used"""
+        self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None
+        }
+
+# Singleton instance
+_transcription_cache: Optional[TranscriptionCache] = None
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Get or create the singleton transcription cache"""
+    global _transcription_cache
+    if _transcription_cache is None:
+        _transcription_cache = TranscriptionCache()
+    return _transcription_cache
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Unix Domain Socket Serving
+Runs a uvicorn app on TCP and, optionally, a Unix domain socket at the same time
+"""
+
+import logging
+import os
+import socket
+import stat
+from typing import Any, Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+def bind_unix_socket(path: str) -> socket.socket:
+    """Bind a stream socket at path, replacing a stale socket file from a previous run"""
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+    
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, 0o660)  # Owner and group only; these services have no auth
+    return sock
+
+def run_server(app: Any, host: str, port: int, uds: Optional[str] = None, **kwargs):
+    """
+    Serve app on host:port, and also on a Unix domain socket if uds is set
+    
+    Local callers on the same host can use the socket to skip the TCP
+    loopback stack, while remote clients (and health checks) keep using TCP.
+    
+    Args:
+        app: ASGI application
+        host: TCP interface to listen on
+        port: TCP port
+        uds: Optional path for the Unix domain socket
+        kwargs: Extra uvicorn.Config options (log_level, timeout_keep_alive...)
+    """
+    if not uds:
+        uvicorn.run(app, host=host, port=port, **kwargs)
+        return
+    
+    config = uvicorn.Config(app, host=host, port=port, **kwargs)
+    server = uvicorn.Server(config)
+    sockets = [config.bind_socket(), bind_unix_socket(uds)]
+    logger.info(f"Also listening on unix socket {uds}")
+    
+    try:
+        server.run(sockets=sockets)
+    finally:
+        if os.path.exists(uds):
+            os.unlink(uds)
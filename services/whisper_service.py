@@ -5,20 +5,31 @@ Provides speech-to-text using faster-whisper
 """
 
 import asyncio
+import io
 import json
 import logging
-from pathlib import Path
-from typing import Optional
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, List, NamedTuple, Tuple
 from pydantic import BaseModel
 
-import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File, Body, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
-from faster_whisper import WhisperModel
-import tempfile
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+import av
+import ctranslate2
+import numpy as np
 import os
 import base64
 
+from repetition_detector import fix_repetitions
+from transcription_cache import get_transcription_cache
+from uds_server import run_server
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,27 +45,768 @@ app = FastAPI(title="Whisper Transcription Service")
 class TranscribeRequest(BaseModel):
     """Request model for transcription"""
     audio_data: str  # Base64 encoded audio
+    model: Optional[str] = None  # Whisper model size, "auto", or None for the default
+
+# Optional Unix domain socket, served alongside 127.0.0.1:7001 for local callers
+WHISPER_UDS = os.environ.get("WHISPER_UDS")
+
+# Inference concurrency
+WHISPER_WORKERS = int(os.environ.get("WHISPER_WORKERS", "2"))  # Parallel transcriptions (model replicas)
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", "0"))  # Threads per replica (0 = library default)
+WHISPER_MAX_QUEUE = int(os.environ.get("WHISPER_MAX_QUEUE", "8"))  # Requests allowed to wait for a free worker
+
+# Micro-batching of concurrent voice commands
+WHISPER_BATCH_WINDOW_MS = float(os.environ.get("WHISPER_BATCH_WINDOW_MS", "10"))  # How long a request waits for companions
+WHISPER_MAX_BATCH = int(os.environ.get("WHISPER_MAX_BATCH", "8"))  # Clips per batched decode (1 disables batching)
+MAX_BATCH_SECONDS = 30  # One Whisper window; longer clips are transcribed on their own
+
+# Streaming (WebSocket) transcription
+STREAM_PARTIAL_MS = int(os.environ.get("WHISPER_STREAM_PARTIAL_MS", "700"))  # New audio between partial hypotheses
+STREAM_PARTIAL_WINDOW_MS = int(os.environ.get("WHISPER_STREAM_PARTIAL_WINDOW_MS", "10000"))  # Trailing audio decoded per partial
+STREAM_SILENCE_MS = int(os.environ.get("WHISPER_STREAM_SILENCE_MS", "700"))  # Trailing silence that ends an utterance
+STREAM_PREROLL_MS = 300  # Audio kept from before speech starts
+STREAM_MAX_SECONDS = 30  # Force a final hypothesis after this much speech
+STREAM_VAD_THRESHOLD = float(os.environ.get("WHISPER_STREAM_VAD_RMS", "0.01"))  # Frame RMS counted as speech
+
+# Model registry
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base.en")  # Default model, or "auto" to choose by duration
+WHISPER_MODELS = os.environ.get("WHISPER_MODELS", "tiny.en,base.en,small.en").split(",")  # Models requests may select
+WHISPER_MEMORY_BUDGET_MB = int(os.environ.get("WHISPER_MEMORY_BUDGET_MB", "1024"))  # Evict LRU models beyond this
+
+# Approximate resident size of int8 CPU models, for the memory budget
+MODEL_MEMORY_MB = {
+    "tiny": 75, "tiny.en": 75,
+    "base": 145, "base.en": 145,
+    "small": 480, "small.en": 480,
+    "medium": 1500, "medium.en": 1500,
+    "large-v2": 3100, "large-v3": 3100
+}
+
+# "auto" picks the first model whose limit covers the clip: (max seconds, model)
+AUTO_MODELS: List[Tuple[float, str]] = [
+    (2.0, "tiny.en"),  # Wake-word confirmations and one-word answers
+    (15.0, "base.en"),  # Voice commands
+    (float("inf"), "small.en")  # Dictation
+]
+
+# Loaded models (created on startup)
+registry: Optional["ModelRegistry"] = None
+
+# Startup warm-up
+WHISPER_WARMUP = os.environ.get("WHISPER_WARMUP", "1") != "0"  # Run a synthetic clip through each model after loading
+ready = False  # Flips once the default model is loaded and warmed up
+startup_metrics: Dict[str, Any] = {}
+startup_task: Optional[asyncio.Task] = None  # Held so the background load isn't garbage-collected
+
+# Worker pool that runs inference off the event loop
+inference_pool: Optional[ThreadPoolExecutor] = None
+active_requests = 0  # Running + waiting transcriptions
+
+def load_model(model_size: str = "base.en") -> WhisperModel:
+    """Load a Whisper model (blocking)"""
+    logger.info(f"Loading Whisper model: {model_size} ({WHISPER_WORKERS} workers)")
+    whisper = WhisperModel(
+        model_size,
+        device="cpu",
+        compute_type="int8",
+        cpu_threads=WHISPER_CPU_THREADS,
+        num_workers=WHISPER_WORKERS  # Lets concurrent transcribe() calls run in parallel
+    )
+    logger.info("Model loaded successfully")
+    return whisper
+
+SAMPLE_RATE = 16000  # Whisper's native input rate
+MAX_AUDIO_SECONDS = int(os.environ.get("WHISPER_MAX_AUDIO_SECONDS", "300"))  # Longest clip a raw upload may hold
+L16_MAX_CHANNELS = 8
+
+def decode_audio_bytes(data: bytes) -> np.ndarray:
+    """
+    Decode an audio clip held in memory to 16kHz mono float32 samples
+    
+    16-bit PCM WAV at 16kHz (what the voice clients send) is read directly;
+    anything else is decoded and resampled by faster-whisper's PyAV decoder.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                if (wav.getsampwidth() == 2 and wav.getframerate() == SAMPLE_RATE
+                        and wav.getcomptype() == "NONE"):
+                    frames = wav.readframes(wav.getnframes())
+                    samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+                    channels = wav.getnchannels()
+                    if channels > 1:
+                        samples = samples.reshape(-1, channels).mean(axis=1)
+                    return samples
+        except (wave.Error, EOFError) as e:
+            logger.debug(f"WAV fast path failed, falling back to PyAV: {e}")
+    
+    return decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE)
+
+def decode_pcm16(data: bytes, rate: int = SAMPLE_RATE, channels: int = 1) -> np.ndarray:
+    """Decode headerless little-endian 16-bit PCM (audio/L16) to 16kHz mono float32"""
+    if rate != SAMPLE_RATE:
+        # Wrap in a WAV header and let PyAV resample
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(channels)
+            wav.setsampwidth(2)
+            wav.setframerate(rate)
+            wav.writeframes(data)
+        return decode_audio_bytes(buffer.getvalue())
+    
+    samples = np.frombuffer(data[:len(data) - len(data) % (2 * channels)], dtype="<i2")
+    samples = samples.astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+def l16_params(content_type: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    (rate, channels) of an audio/L16 content type, or None for other types
+    
+    RFC 2586 parameters, e.g. "audio/L16; rate=16000; channels=1"
+    
+    Raises:
+        HTTPException: 400 for a missing, non-numeric or out-of-range rate or channel count
+    """
+    media_type, _, params = (content_type or "").partition(";")
+    if media_type.strip().lower() != "audio/l16":
+        return None
+    
+    fields = dict(
+        param.strip().lower().split("=", 1) for param in params.split(";") if "=" in param
+    )
+    try:
+        rate = int(fields.get("rate", SAMPLE_RATE))
+        channels = int(fields.get("channels", 1))
+    except ValueError:
+        rate = channels = 0
+    if rate <= 0 or not 1 <= channels <= L16_MAX_CHANNELS:
+        logger.warning(f"Invalid audio/L16 parameters: {params.strip()}")
+        raise HTTPException(status_code=400, detail="Invalid audio")
+    return rate, channels
+
+def max_upload_bytes(content_type: Optional[str]) -> int:
+    """Largest raw body accepted: MAX_AUDIO_SECONDS of PCM (48kHz stereo bounds encoded formats)"""
+    rate, channels = l16_params(content_type) or (48000, 2)
+    return MAX_AUDIO_SECONDS * rate * channels * 2
 
-# Global model instance
-model: Optional[WhisperModel] = None
-
-def load_model(model_size: str = "base.en"):
-    """Load the Whisper model"""
-    global model
-    if model is None:
-        logger.info(f"Loading Whisper model: {model_size}")
-        model = WhisperModel(
-            model_size,
-            device="cpu",
-            compute_type="int8"
+async def load_audio(data: bytes, content_type: Optional[str] = None) -> np.ndarray:
+    """
+    Decode audio bytes without blocking the event loop
+    
+    Args:
+        data: Encoded audio (WAV, Opus/Ogg, MP3...) or raw PCM
+        content_type: Request content type; "audio/L16" selects raw PCM
+    
+    Raises:
+        HTTPException: 400 for empty or undecodable audio
+    """
+    if not data:
+        raise HTTPException(status_code=400, detail="Empty audio")
+    loop = asyncio.get_running_loop()
+    
+    decoder, args = decode_audio_bytes, (data,)
+    pcm = l16_params(content_type)
+    if pcm is not None:
+        decoder, args = decode_pcm16, (data, *pcm)
+    
+    try:
+        audio = await loop.run_in_executor(None, decoder, *args)
+    except av.error.FFmpegError as e:
+        logger.warning(f"Could not decode {len(data)} bytes of audio: {e}")
+        raise HTTPException(status_code=400, detail="Invalid audio")
+    logger.info(f"Decoded {len(data)} bytes to {len(audio) / SAMPLE_RATE:.2f}s of audio")
+    return audio
+
+def _transcribe_sync(whisper: WhisperModel, audio: Any, options: Dict[str, Any]) -> Tuple[List[Any], Any]:
+    """Run a transcription to completion (segments are generated lazily)"""
+    segments, info = whisper.transcribe(audio, **options)
+    return list(segments), info
+
+def log_task_failure(task: asyncio.Task):
+    """Done-callback that logs the exception of a background task"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed: {task.exception()!r}", exc_info=task.exception())
+
+def _check_capacity():
+    """Reject new work once every worker is busy and the queue is full"""
+    if active_requests >= WHISPER_WORKERS + WHISPER_MAX_QUEUE:
+        logger.warning(f"Rejecting transcription: {active_requests} requests in progress")
+        raise HTTPException(
+            status_code=503,
+            detail="Transcription queue full, retry shortly",
+            headers={"Retry-After": "1"}
         )
-        logger.info("Model loaded successfully")
-    return model
+
+async def run_inference(whisper: WhisperModel, audio: Any, **options) -> Tuple[List[Any], Any]:
+    """
+    Transcribe on the worker pool without blocking the event loop
+    
+    Args:
+        whisper: Model to transcribe with
+        audio: Path, file-like object or float32 samples accepted by faster-whisper
+        options: Keyword arguments for WhisperModel.transcribe
+    
+    Returns:
+        (segments, info) with segments fully decoded
+    
+    Raises:
+        HTTPException: 503 when every worker is busy and the queue is full
+    """
+    global active_requests
+    _check_capacity()
+    
+    active_requests += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(inference_pool, _transcribe_sync, whisper, audio, options)
+    finally:
+        active_requests -= 1
+
+# Optimized for fast voice commands (5-10 seconds)
+COMMAND_OPTIONS: Dict[str, Any] = {
+    "language": "en",
+    "task": "transcribe",
+    # Speed optimization
+    "beam_size": 1,  # Greedy search for fastest speed
+    "best_of": 1,  # Single hypothesis only
+    "patience": 1.0,  # Must be > 0
+    "length_penalty": 1.0,
+    # Disable fallback for speed - rely on post-processing guard
+    "temperature": 0.0,  # Single temperature, no fallbacks
+    "compression_ratio_threshold": None,  # Disable compression check
+    "log_prob_threshold": None,  # Disable log prob check
+    "no_speech_threshold": 0.6,  # Default threshold
+    # Context handling
+    "condition_on_previous_text": False,  # Avoid runaway from prior segment
+    "initial_prompt": None,
+    # VAD & timestamps
+    "vad_filter": True,
+    "vad_parameters": {"min_silence_duration_ms": 500},
+    "without_timestamps": True,
+    # Token limits for short commands
+    "max_new_tokens": 128,  # Limit output for voice commands
+    # Token suppression
+    "suppress_blank": True,
+    "suppress_tokens": [-1]  # Default suppression list
+}
+
+class BatchSegment(NamedTuple):
+    """Segment of a batched transcription (the fields transcribe_command reads)"""
+    text: str
+
+class BatchInfo(NamedTuple):
+    """Transcription info of a batched transcription"""
+    language: str
+    language_probability: float
+    duration: float
+
+def _transcribe_batch_sync(whisper: WhisperModel, audios: List[np.ndarray]) -> List[Tuple[List[Any], Any]]:
+    """
+    Transcribe several short clips with a single batched generate() call
+    
+    Follows what model.transcribe() does with COMMAND_OPTIONS for a clip
+    that fits in one 30s window: Silero VAD, log-Mel features, greedy
+    decoding without timestamps and the no-speech check. Only the
+    features of every clip are stacked, so the encoder and decoder run
+    once for the whole batch.
+    """
+    options = COMMAND_OPTIONS
+    extractor = whisper.feature_extractor
+    tokenizer = Tokenizer(
+        whisper.hf_tokenizer,
+        whisper.model.is_multilingual,
+        task=options["task"],
+        language=options["language"]
+    )
+    prompt = whisper.get_prompt(tokenizer, [], without_timestamps=True)
+    vad_options = VadOptions(**options["vad_parameters"])
+    
+    speech = [collect_chunks(audio, get_speech_timestamps(audio, vad_options)) for audio in audios]
+    texts = [""] * len(audios)
+    
+    voiced = [i for i, clip in enumerate(speech) if len(clip)]
+    if voiced:
+        features = np.stack([extractor(speech[i])[:, :extractor.nb_max_frames] for i in voiced])
+        results = whisper.model.generate(
+            ctranslate2.StorageView.from_array(np.ascontiguousarray(features, dtype=np.float32)),
+            [prompt] * len(voiced),
+            beam_size=options["beam_size"],
+            patience=options["patience"],
+            length_penalty=options["length_penalty"],
+            max_length=len(prompt) + options["max_new_tokens"],
+            return_no_speech_prob=True,
+            suppress_blank=options["suppress_blank"],
+            suppress_tokens=options["suppress_tokens"]
+        )
+        for i, result in zip(voiced, results):
+            if result.no_speech_prob > options["no_speech_threshold"]:
+                continue
+            texts[i] = tokenizer.decode(result.sequences_ids[0])
+    
+    return [
+        (
+            [BatchSegment(text)] if text.strip() else [],
+            BatchInfo(options["language"], 1.0, len(audio) / SAMPLE_RATE)
+        )
+        for text, audio in zip(texts, audios)
+    ]
+
+class MicroBatcher:
+    """
+    Groups concurrent voice commands into batched decodes
+    
+    A request waits up to WHISPER_BATCH_WINDOW_MS for others to arrive;
+    the group (at most WHISPER_MAX_BATCH clips) is then transcribed by one
+    _transcribe_batch_sync call on the worker pool and each caller's
+    future gets its own result.
+    """
+    
+    def __init__(self, whisper: WhisperModel,
+                 window_ms: float = WHISPER_BATCH_WINDOW_MS, max_batch: int = WHISPER_MAX_BATCH):
+        self.whisper = whisper
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._pending: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        
+        # Stats
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.fallbacks = 0
+    
+    async def submit(self, audio: np.ndarray) -> Tuple[List[Any], Any]:
+        """
+        Queue a clip for the next batch
+        
+        Returns:
+            (segments, info) like run_inference
+        
+        Raises:
+            HTTPException: 503 when every worker is busy and the queue is full
+        """
+        global active_requests
+        _check_capacity()
+        
+        active_requests += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending.append((audio, future))
+            
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.window, self._flush)
+            
+            return await future
+        finally:
+            active_requests -= 1
+    
+    def _flush(self):
+        """Send everything pending to the worker pool as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self._pending = self._pending, []
+        batch = [(audio, future) for audio, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        
+        loop = asyncio.get_running_loop()
+        work = loop.run_in_executor(inference_pool, self._run_batch, [audio for audio, _ in batch])
+        work.add_done_callback(lambda done: self._resolve(batch, done))
+    
+    def _run_batch(self, audios: List[np.ndarray]) -> Tuple[List[Tuple[List[Any], Any]], bool]:
+        """
+        Worker-thread body: batched decode, falling back to one clip at a time
+        
+        Returns:
+            (results, fell_back); counters are left to _resolve on the event loop
+        """
+        fell_back = False
+        if len(audios) > 1:
+            try:
+                return _transcribe_batch_sync(self.whisper, audios), False
+            except Exception as e:
+                fell_back = True
+                logger.warning(f"Batched decode of {len(audios)} clips failed, transcribing individually: {e}")
+        
+        return [_transcribe_sync(self.whisper, audio, COMMAND_OPTIONS) for audio in audios], fell_back
+    
+    def _resolve(self, batch: List[Tuple[np.ndarray, asyncio.Future]], done: asyncio.Future):
+        """Hand each caller its result (or the batch's exception)"""
+        error = done.exception()
+        results = None
+        if error is None:
+            results, fell_back = done.result()
+            if fell_back:
+                self.fallbacks += 1
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(results[index])
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "largest_batch": self.largest_batch,
+            "fallbacks": self.fallbacks
+        }
+
+class LoadedModel:
+    """A model held by the registry, with its batcher and usage stats"""
+    
+    def __init__(self, name: str, whisper: WhisperModel, load_seconds: float, warmup_seconds: float = 0.0):
+        self.name = name
+        self.whisper = whisper
+        self.memory_mb = MODEL_MEMORY_MB.get(name, 500)
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.requests = 0
+        self.batcher = MicroBatcher(whisper) if WHISPER_MAX_BATCH > 1 else None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory_mb": self.memory_mb,
+            "load_seconds": round(self.load_seconds, 2),
+            "warmup_seconds": round(self.warmup_seconds, 2),
+            "requests": self.requests,
+            "batching": self.batcher.stats() if self.batcher is not None else None
+        }
+
+class ModelRegistry:
+    """
+    Whisper models loaded on first use
+    
+    Models are kept in least-recently-used order; loading one that
+    pushes the estimated total past WHISPER_MEMORY_BUDGET_MB evicts the
+    least recently used others. Requests still running on an evicted
+    model keep their reference and finish normally.
+    """
+    
+    def __init__(self, allowed: List[str] = WHISPER_MODELS,
+                 default: str = WHISPER_MODEL, budget_mb: int = WHISPER_MEMORY_BUDGET_MB):
+        self.allowed = [name.strip() for name in allowed if name.strip()]
+        self.default = default
+        self.budget_mb = budget_mb
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.evictions = 0
+        
+        # The default and automatic choices are always selectable
+        for name in [default] + [name for _, name in AUTO_MODELS]:
+            if name != "auto" and name not in self.allowed:
+                self.allowed.append(name)
+    
+    def select(self, requested: Optional[str], duration: float) -> str:
+        """
+        Resolve the model for a request
+        
+        Args:
+            requested: Model name, "auto", or None for the default
+            duration: Clip length in seconds (used by "auto")
+        """
+        name = requested or self.default
+        if name == "auto":
+            name = next(model_name for limit, model_name in AUTO_MODELS if duration <= limit)
+        if name not in self.allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown model '{name}' (available: {', '.join(self.allowed)}, auto)"
+            )
+        return name
+    
+    async def get(self, name: str, count: bool = True) -> LoadedModel:
+        """Return a loaded model, loading it (and evicting others) if needed; count=False for internal use"""
+        loaded = self._models.get(name)
+        if loaded is None:
+            lock = self._locks.setdefault(name, asyncio.Lock())
+            async with lock:
+                loaded = self._models.get(name)
+                if loaded is None:
+                    loaded = await self._load(name)
+        
+        self._models.move_to_end(name)
+        if count:
+            loaded.requests += 1
+        return loaded
+    
+    async def _load(self, name: str) -> LoadedModel:
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        whisper = await loop.run_in_executor(None, load_model, name)
+        load_seconds = time.perf_counter() - start
+        
+        warmup_seconds = 0.0
+        if WHISPER_WARMUP:
+            warmup_seconds = await loop.run_in_executor(inference_pool, warm_up_model, whisper)
+            logger.info(f"Warmed up Whisper model {name} in {warmup_seconds:.2f}s")
+        
+        loaded = LoadedModel(name, whisper, load_seconds, warmup_seconds)
+        
+        self._models[name] = loaded
+        while self.memory_mb > self.budget_mb and len(self._models) > 1:
+            evicted_name, _ = self._models.popitem(last=False)
+            self.evictions += 1
+            logger.info(f"Evicted Whisper model {evicted_name} (budget {self.budget_mb} MB)")
+        
+        logger.info(f"Loaded Whisper model {name} in {loaded.load_seconds:.1f}s "
+                    f"({self.memory_mb} MB of {self.budget_mb} MB budget in use)")
+        return loaded
+    
+    @property
+    def loaded(self) -> List[str]:
+        """Names of the models currently in memory"""
+        return list(self._models)
+    
+    @property
+    def memory_mb(self) -> int:
+        return sum(loaded.memory_mb for loaded in self._models.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Loaded models and budget usage for monitoring"""
+        return {
+            "default": self.default,
+            "available": self.allowed,
+            "memory_mb": self.memory_mb,
+            "budget_mb": self.budget_mb,
+            "evictions": self.evictions,
+            "loaded": {name: loaded.stats() for name, loaded in self._models.items()}
+        }
+
+async def get_model(requested: Optional[str], audio: np.ndarray) -> LoadedModel:
+    """Model for a request, chosen by name or by the clip's duration"""
+    return await registry.get(registry.select(requested, len(audio) / SAMPLE_RATE))
+
+async def transcribe_command(audio: np.ndarray, model: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Transcribe a short voice command and clean up repetitions
+    
+    Args:
+        audio: 16kHz mono float32 samples
+        model: Whisper model name, "auto", or None for the default
+    
+    Returns:
+        Transcription and metadata for the JSON response
+    """
+    name = registry.select(model, len(audio) / SAMPLE_RATE)
+    
+    # Retries resend identical audio; answer them without running inference
+    cache = get_transcription_cache()
+    cache_key = cache.key(audio, name) if cache.enabled else None
+    if cache_key is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Transcription cache hit: '{cached['transcription'][:100]}'")
+            return cached
+    
+    loaded = await registry.get(name)
+    if loaded.batcher is not None and len(audio) <= SAMPLE_RATE * MAX_BATCH_SECONDS:
+        segments, info = await loaded.batcher.submit(audio)
+    else:
+        segments, info = await run_inference(loaded.whisper, audio, **COMMAND_OPTIONS)
+    
+    logger.info(f"Audio duration: {info.duration} seconds")
+    logger.info(f"Detected language: {info.language} (probability: {info.language_probability})")
+    
+    # Collect results
+    transcription = " ".join([segment.text.strip() for segment in segments])
+    
+    # Post-processing guard: detect and fix repetitions
+    transcription = fix_repetitions(transcription)
+    
+    # Log transcription result
+    if transcription:
+        logger.info(f"Transcribed: '{transcription[:100]}...' (length: {len(transcription)})")
+    else:
+        logger.warning("Empty transcription result")
+    
+    result = {
+        "transcription": transcription,
+        "language": info.language,
+        "duration": info.duration,
+        "language_probability": info.language_probability,
+        "model": loaded.name
+    }
+    if cache_key is not None:
+        cache.put(cache_key, result)
+    return result
+
+# Partial hypotheses skip the Silero VAD pass; StreamingTranscriber already gates on energy
+PARTIAL_OPTIONS: Dict[str, Any] = {**COMMAND_OPTIONS, "vad_filter": False, "vad_parameters": None}
+
+def synthetic_clip(seconds: float = 2.0) -> np.ndarray:
+    """Speech-like test signal: voiced harmonics with a syllable-rate envelope"""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    return (0.3 * voiced * envelope).astype(np.float32)
+
+def warm_up_model(whisper: WhisperModel) -> float:
+    """
+    Run a synthetic clip through a freshly loaded model (blocking)
+    
+    The first transcription pays for CTranslate2 initialisation and for
+    loading the Silero VAD model. The clip goes through the command
+    pipeline (VAD on) and through the partial pipeline (VAD off), since
+    VAD may discard synthetic audio before the encoder ever runs.
+    
+    Returns:
+        Seconds spent warming up
+    """
+    start = time.perf_counter()
+    clip = synthetic_clip()
+    for options in (COMMAND_OPTIONS, PARTIAL_OPTIONS):
+        _transcribe_sync(whisper, clip, options)
+    return time.perf_counter() - start
+
+class StreamingTranscriber:
+    """
+    Utterance buffer for one WebSocket stream
+    
+    Frames are classified as speech or silence by RMS energy. Leading
+    silence is dropped (apart from a short pre-roll), and an utterance
+    ends after STREAM_SILENCE_MS of trailing silence.
+    """
+    
+    def __init__(self):
+        self._reset()
+    
+    def _reset(self):
+        self.chunks: List[np.ndarray] = []
+        self.samples = 0
+        self.speaking = False
+        self.silence_samples = 0
+        self.decoded_samples = 0
+    
+    def add_frame(self, frame: bytes):
+        """Append a frame of 16kHz mono PCM16 audio"""
+        samples = decode_pcm16(frame)
+        if not len(samples):
+            return
+        
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if rms >= STREAM_VAD_THRESHOLD:
+            self.speaking = True
+            self.silence_samples = 0
+        elif self.speaking:
+            self.silence_samples += len(samples)
+        
+        self.chunks.append(samples)
+        self.samples += len(samples)
+        
+        if not self.speaking:
+            # Keep only the pre-roll until speech starts
+            preroll = SAMPLE_RATE * STREAM_PREROLL_MS // 1000
+            while self.chunks and self.samples - len(self.chunks[0]) >= preroll:
+                self.samples -= len(self.chunks.pop(0))
+    
+    @property
+    def partial_due(self) -> bool:
+        """Enough new speech has arrived for another partial hypothesis"""
+        new_samples = self.samples - self.decoded_samples
+        return self.speaking and new_samples >= SAMPLE_RATE * STREAM_PARTIAL_MS // 1000
+    
+    @property
+    def utterance_ended(self) -> bool:
+        """Trailing silence (or the length cap) marks the end of the utterance"""
+        if not self.speaking:
+            return False
+        return (self.silence_samples >= SAMPLE_RATE * STREAM_SILENCE_MS // 1000
+                or self.samples >= SAMPLE_RATE * STREAM_MAX_SECONDS)
+    
+    def snapshot(self) -> np.ndarray:
+        """Audio of the current utterance so far"""
+        self.decoded_samples = self.samples
+        return np.concatenate(self.chunks) if self.chunks else np.zeros(0, dtype=np.float32)
+    
+    def recent(self, window_ms: int = STREAM_PARTIAL_WINDOW_MS) -> np.ndarray:
+        """The last window_ms of the current utterance, for a partial hypothesis"""
+        self.decoded_samples = self.samples
+        wanted = max(SAMPLE_RATE * window_ms // 1000, 1)
+        tail, count = [], 0
+        for chunk in reversed(self.chunks):
+            if count >= wanted:
+                break
+            tail.append(chunk)
+            count += len(chunk)
+        audio = np.concatenate(tail[::-1]) if tail else np.zeros(0, dtype=np.float32)
+        return audio[-wanted:]
+    
+    def take(self) -> Optional[np.ndarray]:
+        """Remove and return the utterance, or None if no speech was heard"""
+        audio = self.snapshot() if self.speaking else None
+        self._reset()
+        return audio
+
+async def prepare_default_model(started: float):
+    """Load and warm up the default model, then mark the service ready"""
+    global ready
+    try:
+        loaded = await registry.get(registry.select(None, 5.0), count=False)  # The model a typical voice command uses
+        
+        # One pass through the async path too (decoder, pool threads), bypassing
+        # transcribe_command so the cache and request stats stay clean
+        warm_start = time.perf_counter()
+        if WHISPER_WARMUP:
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(SAMPLE_RATE)
+                wav.writeframes((synthetic_clip() * 32767).astype("<i2").tobytes())
+            await run_inference(loaded.whisper, await load_audio(buffer.getvalue()), **COMMAND_OPTIONS)
+        
+        startup_metrics.update({
+            "model": loaded.name,
+            "model_load_seconds": round(loaded.load_seconds, 2),
+            "model_warmup_seconds": round(loaded.warmup_seconds, 2),
+            "pipeline_warmup_seconds": round(time.perf_counter() - warm_start, 2),
+            "total_seconds": round(time.perf_counter() - started, 2)
+        })
+        ready = True
+        logger.info(f"Whisper service ready in {startup_metrics['total_seconds']}s: {startup_metrics}")
+    except Exception as e:
+        startup_metrics["error"] = str(e)
+        logger.error(f"Failed to prepare default Whisper model: {e}")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the model on startup"""
-    load_model()
+    """Initialize the worker pool and start loading the default model"""
+    global inference_pool, registry, startup_task
+    started = time.perf_counter()
+    inference_pool = ThreadPoolExecutor(max_workers=WHISPER_WORKERS, thread_name_prefix="whisper")
+    registry = ModelRegistry()
+    
+    # Load in the background so /health answers during warm-up; requests
+    # that arrive early wait on the registry's load lock
+    startup_task = asyncio.create_task(prepare_default_model(started), name="prepare_default_model")
+    startup_task.add_done_callback(log_task_failure)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the startup task and the worker pool"""
+    if startup_task is not None and not startup_task.done():
+        startup_task.cancel()
+    if inference_pool is not None:
+        inference_pool.shutdown(wait=False)
 
 @app.post("/transcribe")
 async def transcribe_audio(request: TranscribeRequest = Body(...)):
@@ -67,276 +819,119 @@ async def transcribe_audio(request: TranscribeRequest = Body(...)):
     Returns:
         JSON with transcription and metadata
     """
-    if model is None:
+    if registry is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
         # Decode base64 audio
         logger.info(f"Received audio_data of length: {len(request.audio_data)}")
         audio_bytes = base64.b64decode(request.audio_data)
-        logger.info(f"Decoded to {len(audio_bytes)} bytes")
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_path = tmp_file.name
-        
-        # Transcribe
-        logger.info(f"Transcribing audio from {tmp_path}")
-        
-        # Check audio file size for debugging
-        import os
-        file_size = os.path.getsize(tmp_path)
-        logger.info(f"Audio file size: {file_size} bytes")
-        
-        # Optimized for fast voice commands (5-10 seconds)
-        segments, info = model.transcribe(
-            tmp_path,
-            language="en",
-            task="transcribe",
-            # Speed optimization
-            beam_size=1,  # Greedy search for fastest speed
-            best_of=1,  # Single hypothesis only
-            patience=1.0,  # Must be > 0
-            length_penalty=1.0,
-            # Disable fallback for speed - rely on post-processing guard
-            temperature=0.0,  # Single temperature, no fallbacks
-            compression_ratio_threshold=None,  # Disable compression check
-            log_prob_threshold=None,  # Disable log prob check
-            no_speech_threshold=0.6,  # Default threshold
-            # Context handling
-            condition_on_previous_text=False,  # Avoid runaway from prior segment
-            initial_prompt=None,
-            # VAD & timestamps
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500),
-            without_timestamps=True,
-            # Token limits for short commands
-            max_new_tokens=128,  # Limit output for voice commands
-            # Token suppression
-            suppress_blank=True,
-            suppress_tokens=[-1]  # Default suppression list
-        )
-        
-        logger.info(f"Audio duration: {info.duration} seconds")
-        logger.info(f"Detected language: {info.language} (probability: {info.language_probability})")
-        
-        # Collect results
-        transcription = " ".join([segment.text.strip() for segment in segments])
-        
-        # Post-processing guard: detect and fix repetitions
-        import gzip
-        if transcription:
-            # Check compression ratio for repetition detection
-            text_bytes = transcription.encode('utf-8')
-            compressed = gzip.compress(text_bytes)
-            compression_ratio = len(text_bytes) / len(compressed)
-            
-            if compression_ratio > 3.5:
-                logger.warning(f"High compression ratio detected: {compression_ratio:.2f}, applying repetition fix")
-                
-                # Split into sentences and remove consecutive duplicates
-                sentences = transcription.replace('?', '?|').replace('.', '.|').replace('!', '!|').split('|')
-                unique_sentences = []
-                for sentence in sentences:
-                    sentence = sentence.strip()
-                    if sentence and (not unique_sentences or sentence != unique_sentences[-1]):
-                        unique_sentences.append(sentence)
-                
-                # Also check for repeated phrases within sentences
-                original_transcription = transcription
-                transcription = ' '.join(unique_sentences)
-                
-                # If still repetitive, truncate to first occurrence
-                words = transcription.split()
-                if len(words) > 10:
-                    for n in [8, 7, 6, 5, 4, 3]:  # Check for n-gram repetitions
-                        for i in range(len(words) - n):
-                            ngram = ' '.join(words[i:i+n])
-                            rest = ' '.join(words[i+n:])
-                            if ngram in rest:
-                                # Found repetition, truncate
-                                transcription = ' '.join(words[:i+n])
-                                logger.warning(f"Truncated repetitive {n}-gram at position {i}")
-                                break
-                        if len(transcription.split()) < len(words):
-                            break
-                
-                logger.info(f"Fixed repetition: {len(original_transcription)} -> {len(transcription)} chars")
-        
-        # Log transcription result
-        if transcription:
-            logger.info(f"Transcribed: '{transcription[:100]}...' (length: {len(transcription)})")
-        else:
-            logger.warning("Empty transcription result")
+        audio = await load_audio(audio_bytes)
         
-        # Clean up
-        os.unlink(tmp_path)
-        
-        return JSONResponse(content={
-            "transcription": transcription,
-            "language": info.language,
-            "duration": info.duration,
-            "language_probability": info.language_probability
-        })
+        return JSONResponse(content=await transcribe_command(audio, request.model))
         
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
         logger.error(f"Transcription error: {error_msg}")
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
-        if 'tmp_path' in locals():
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
         raise HTTPException(status_code=500, detail=error_msg)
 
 @app.post("/transcribe/file")
-async def transcribe_file(audio: UploadFile = File(...)):
+async def transcribe_file(audio: UploadFile = File(...), model: Optional[str] = Form(None)):
     """
     Transcribe audio file upload
     
     Args:
         audio: Audio file upload (wav, mp3, etc.)
+        model: Whisper model name, "auto", or omitted for the default
     
     Returns:
         JSON with transcription and metadata
     """
-    if model is None:
+    if registry is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(audio.filename).suffix) as tmp_file:
-            content = await audio.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
-        
-        # Check audio file size for debugging
-        file_size = os.path.getsize(tmp_path)
-        logger.info(f"Transcribing audio file: {audio.filename} (size: {file_size} bytes)")
-        
-        # Optimized for fast voice commands (5-10 seconds)
-        segments, info = model.transcribe(
-            tmp_path,
-            language="en",
-            task="transcribe",
-            # Speed optimization
-            beam_size=1,  # Greedy search for fastest speed
-            best_of=1,  # Single hypothesis only
-            patience=1.0,  # Must be > 0
-            length_penalty=1.0,
-            # Disable fallback for speed - rely on post-processing guard
-            temperature=0.0,  # Single temperature, no fallbacks
-            compression_ratio_threshold=None,  # Disable compression check
-            log_prob_threshold=None,  # Disable log prob check
-            no_speech_threshold=0.6,  # Default threshold
-            # Context handling
-            condition_on_previous_text=False,  # Avoid runaway from prior segment
-            initial_prompt=None,
-            # VAD & timestamps
-            vad_filter=True,
-            vad_parameters=dict(min_silence_duration_ms=500),
-            without_timestamps=True,
-            # Token limits for short commands
-            max_new_tokens=128,  # Limit output for voice commands
-            # Token suppression
-            suppress_blank=True,
-            suppress_tokens=[-1]  # Default suppression list
-        )
+        content = await audio.read()
+        logger.info(f"Transcribing audio file: {audio.filename} (size: {len(content)} bytes)")
+        samples = await load_audio(content)
         
-        logger.info(f"Audio duration: {info.duration} seconds")
-        logger.info(f"Detected language: {info.language} (probability: {info.language_probability})")
+        return JSONResponse(content=await transcribe_command(samples, model))
         
-        # Collect results
-        transcription = " ".join([segment.text.strip() for segment in segments])
-        
-        # Post-processing guard: detect and fix repetitions
-        import gzip
-        if transcription:
-            # Check compression ratio for repetition detection
-            text_bytes = transcription.encode('utf-8')
-            compressed = gzip.compress(text_bytes)
-            compression_ratio = len(text_bytes) / len(compressed)
-            
-            if compression_ratio > 3.5:
-                logger.warning(f"High compression ratio detected: {compression_ratio:.2f}, applying repetition fix")
-                
-                # Split into sentences and remove consecutive duplicates
-                sentences = transcription.replace('?', '?|').replace('.', '.|').replace('!', '!|').split('|')
-                unique_sentences = []
-                for sentence in sentences:
-                    sentence = sentence.strip()
-                    if sentence and (not unique_sentences or sentence != unique_sentences[-1]):
-                        unique_sentences.append(sentence)
-                
-                # Also check for repeated phrases within sentences
-                original_transcription = transcription
-                transcription = ' '.join(unique_sentences)
-                
-                # If still repetitive, truncate to first occurrence
-                words = transcription.split()
-                if len(words) > 10:
-                    for n in [8, 7, 6, 5, 4, 3]:  # Check for n-gram repetitions
-                        for i in range(len(words) - n):
-                            ngram = ' '.join(words[i:i+n])
-                            rest = ' '.join(words[i+n:])
-                            if ngram in rest:
-                                # Found repetition, truncate
-                                transcription = ' '.join(words[:i+n])
-                                logger.warning(f"Truncated repetitive {n}-gram at position {i}")
-                                break
-                        if len(transcription.split()) < len(words):
-                            break
-                
-                logger.info(f"Fixed repetition: {len(original_transcription)} -> {len(transcription)} chars")
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
+        logger.error(f"File transcription error: {error_msg}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=error_msg)
+
+@app.post("/transcribe/raw")
+async def transcribe_raw(request: Request, model: Optional[str] = None):
+    """
+    Transcribe audio sent as the raw request body
+    
+    Avoids the base64/JSON round trip of /transcribe. The Content-Type
+    header selects the decoder: audio/wav, audio/ogg (Opus) and other
+    container formats are probed, audio/L16 is headerless 16-bit PCM
+    (rate and channels parameters, default 16kHz mono). The optional
+    model query parameter selects the Whisper model. Bodies longer than
+    MAX_AUDIO_SECONDS of audio are rejected with 413.
+    
+    Returns:
+        JSON with transcription and metadata
+    """
+    if registry is None:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    try:
+        content_type = request.headers.get("content-type")
+        limit = max_upload_bytes(content_type)
+        too_large = HTTPException(status_code=413, detail=f"Audio too large (max {MAX_AUDIO_SECONDS}s)")
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            raise too_large
         
-        # Log transcription result
-        if transcription:
-            logger.info(f"Transcribed: '{transcription[:100]}...' (length: {len(transcription)})")
-        else:
-            logger.warning("Empty transcription result")
+        body = bytearray()
+        async for chunk in request.stream():
+            body.extend(chunk)
+            if len(body) > limit:
+                raise too_large
         
-        # Clean up
-        os.unlink(tmp_path)
+        logger.info(f"Transcribing raw audio body ({len(body)} bytes, {content_type})")
+        samples = await load_audio(bytes(body), content_type)
         
-        return JSONResponse(content={
-            "transcription": transcription,
-            "language": info.language,
-            "duration": info.duration,
-            "language_probability": info.language_probability
-        })
+        return JSONResponse(content=await transcribe_command(samples, model))
         
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = str(e) if str(e) else f"{type(e).__name__}: {repr(e)}"
-        logger.error(f"File transcription error: {error_msg}")
+        logger.error(f"Raw transcription error: {error_msg}")
         import traceback
         logger.error(f"Traceback: {traceback.format_exc()}")
-        if 'tmp_path' in locals():
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
         raise HTTPException(status_code=500, detail=error_msg)
 
 @app.post("/transcribe/stream")
-async def transcribe_stream(audio: UploadFile = File(...)):
+async def transcribe_stream(audio: UploadFile = File(...), model: Optional[str] = Form(None)):
     """
     Transcribe audio with word-level timestamps
     """
-    if model is None:
+    if registry is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            content = await audio.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        samples = await load_audio(await audio.read())
+        loaded = await get_model(model, samples)
         
         # Transcribe with word timestamps
-        segments, info = model.transcribe(
-            tmp_path,
+        segments, info = await run_inference(
+            loaded.whisper,
+            samples,
             beam_size=5,
             language="en",
             task="transcribe",
@@ -366,36 +961,138 @@ async def transcribe_stream(audio: UploadFile = File(...)):
                 ]
             result_segments.append(seg_data)
         
-        # Clean up
-        os.unlink(tmp_path)
-        
         return JSONResponse(content={
             "segments": result_segments,
             "language": info.language,
-            "duration": info.duration
+            "duration": info.duration,
+            "model": loaded.name
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Stream transcription error: {str(e)}")
-        if 'tmp_path' in locals():
-            try:
-                os.unlink(tmp_path)
-            except:
-                pass
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.websocket("/transcribe/ws")
+async def transcribe_websocket(websocket: WebSocket, model: Optional[str] = None):
+    """
+    Transcribe audio incrementally as it is spoken
+    
+    The client sends binary frames of 16kHz mono little-endian PCM16 and
+    may send {"type": "end"} to finish an utterance early. The server
+    sends {"type": "partial", ...} hypotheses while speech continues and
+    {"type": "final", ...} (same fields as /transcribe) once the speaker
+    pauses. The connection stays open for further utterances. The
+    optional model query parameter applies to every hypothesis.
+    """
+    await websocket.accept()
+    if registry is None:
+        await websocket.close(code=1013, reason="Model not loaded")
+        return
+    
+    stream = StreamingTranscriber()
+    partial_task: Optional[asyncio.Task] = None
+    
+    async def send_partial(audio: np.ndarray, duration: float):
+        # Partials are best effort: never queue them behind (or ahead of) real commands
+        if active_requests >= WHISPER_WORKERS:
+            logger.debug("Skipping partial hypothesis, all workers busy")
+            return
+        try:
+            loaded = await registry.get(registry.select(model, duration))
+            segments, info = await run_inference(loaded.whisper, audio, **PARTIAL_OPTIONS)
+        except HTTPException:
+            return  # Bad model or queue full; the final reports it
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if text:
+            await websocket.send_json({
+                "type": "partial",
+                "transcription": text,
+                "duration": duration
+            })
+    
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes"):
+                stream.add_frame(message["bytes"])
+                finished = stream.utterance_ended
+            elif message.get("text"):
+                try:
+                    finished = json.loads(message["text"]).get("type") == "end"
+                except (ValueError, AttributeError):
+                    await websocket.send_json({"type": "error", "detail": "Invalid control message"})
+                    continue
+            else:
+                continue
+            
+            if finished:
+                if partial_task is not None:
+                    partial_task.cancel()
+                    partial_task = None
+                
+                audio = stream.take()
+                if audio is None:
+                    result = {"transcription": "", "language": "en", "duration": 0.0,
+                              "language_probability": 0.0}
+                else:
+                    try:
+                        result = await transcribe_command(audio, model)
+                    except HTTPException as e:
+                        await websocket.send_json({"type": "error", "detail": e.detail})
+                        continue
+                await websocket.send_json({"type": "final", **result})
+                
+            elif stream.partial_due and (partial_task is None or partial_task.done()):
+                partial_task = asyncio.create_task(send_partial(stream.recent(), stream.samples / SAMPLE_RATE))
+                partial_task.add_done_callback(log_task_failure)
+                
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"WebSocket transcription error: {e}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(code=1011)
+        except Exception:
+            pass  # Client already gone
+    finally:
+        if partial_task is not None:
+            partial_task.cancel()
+        logger.info("Streaming transcription closed")
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 only once the default model is loaded and warmed up"""
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "startup": startup_metrics}
+    )
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "model_loaded": model is not None
+        "ready": ready,
+        "startup": startup_metrics,
+        "model_loaded": registry is not None and bool(registry.loaded),
+        "workers": WHISPER_WORKERS,
+        "active_requests": active_requests,
+        "max_queue": WHISPER_MAX_QUEUE,
+        "models": registry.stats() if registry is not None else None,
+        "transcription_cache": get_transcription_cache().stats()
     }
 
 if __name__ == "__main__":
-    uvicorn.run(
+    run_server(
         app,
         host="127.0.0.1",
         port=7001,
+        uds=WHISPER_UDS,
         log_level="info"
     )
\ No newline at end of file
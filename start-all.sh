@@ -153,8 +153,10 @@ main() {
     sleep 3
     
     # Check Whisper service
-    if curl -s -f "http://localhost:7001/health" > /dev/null 2>&1; then
-        log_info "Whisper service is healthy"
+    if curl -s -f "http://localhost:7001/ready" > /dev/null 2>&1; then
+        log_info "Whisper service is ready"
+    elif curl -s -f "http://localhost:7001/health" > /dev/null 2>&1; then
+        log_info "Whisper service is healthy (model still warming up)"
     else
         log_warn "Whisper service not responding (voice transcription unavailable)"
     fi
@@ -187,6 +189,7 @@ main() {
     echo "  Whisper ASR: http://localhost:7001"
     echo "  - POST /transcribe - Transcribe audio to text"
     echo "  - GET /health - Service health"
+    echo "  - GET /ready - Model loaded and warmed up"
     echo ""
     echo "  MCP Servers:"
     echo "  - Router: http://localhost:8090"
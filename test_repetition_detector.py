@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests and micro-benchmark for the Whisper repetition detector
+Run with pytest, or directly to also print the benchmark
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "services"))
+
+from repetition_detector import (
+    compression_ratio,
+    dedupe_sentences,
+    find_repeated_ngram,
+    fix_repetitions,
+    truncate_repetition
+)
+
+def legacy_truncate(text):
+    """The substring-search n-gram guard this module replaced (quadratic or worse)"""
+    words = text.split()
+    if len(words) <= 10:
+        return text
+    for n in [8, 7, 6, 5, 4, 3]:
+        for i in range(len(words) - n):
+            ngram = ' '.join(words[i:i+n])
+            rest = ' '.join(words[i+n:])
+            if ngram in rest:
+                return ' '.join(words[:i+n])
+    return text
+
+def naive_find(words, n):
+    """Reference implementation of find_repeated_ngram"""
+    for i in range(len(words) - n + 1):
+        for j in range(i + n, len(words) - n + 1):
+            if words[i:i+n] == words[j:j+n]:
+                return i
+    return None
+
+def hallucinated_transcript(words):
+    """A short command followed by a phrase repeated until the word count is reached"""
+    loop = "thank you for watching and see you in the next video".split()
+    text = "please turn on the kitchen lights".split()
+    while len(text) < words:
+        text.extend(loop)
+    return ' '.join(text[:words])
+
+def test_compression_ratio():
+    assert compression_ratio("the cat sat on the mat") < 2
+    assert compression_ratio("thank you " * 200) > 3.5
+
+def test_dedupe_sentences():
+    assert dedupe_sentences("Hello there. Hello there. How are you?") == "Hello there. How are you?"
+    assert dedupe_sentences("Yes. No. Yes.") == "Yes. No. Yes."
+
+def test_find_repeated_ngram():
+    words = "a b c d e f a b c x".split()
+    assert find_repeated_ngram(words, 3) == 0
+    assert find_repeated_ngram(words, 4) is None
+    # Overlapping occurrences do not count as a repeat
+    assert find_repeated_ngram("a a a a".split(), 3) is None
+    assert find_repeated_ngram("a a a a a a".split(), 3) == 0
+    assert find_repeated_ngram([], 3) is None
+    assert find_repeated_ngram("a b".split(), 3) is None
+
+def test_find_repeated_ngram_matches_naive():
+    rng = random.Random(7)
+    for _ in range(500):
+        words = [rng.choice("abcd") for _ in range(rng.randint(0, 30))]
+        for n in range(1, 6):
+            assert find_repeated_ngram(words, n) == naive_find(words, n), (words, n)
+
+def test_truncate_repetition():
+    text = hallucinated_transcript(60)
+    truncated, found = truncate_repetition(text)
+    assert found == (8, 6)
+    assert truncated == "please turn on the kitchen lights thank you for watching and see you in"
+    
+    short = "turn it off turn it off"
+    assert truncate_repetition(short) == (short, None)
+
+def test_truncate_matches_legacy_on_word_boundaries():
+    rng = random.Random(11)
+    vocabulary = ["turn", "on", "the", "lights", "please", "now", "okay", "thanks"]
+    for _ in range(300):
+        text = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(5, 40)))
+        assert truncate_repetition(text)[0] == legacy_truncate(text)
+
+def test_fix_repetitions_leaves_normal_text_alone():
+    text = "Schedule a meeting with the design team tomorrow at three and send everyone the agenda"
+    assert fix_repetitions(text) == text
+    assert fix_repetitions("") == ""
+
+def test_fix_repetitions_trims_hallucination():
+    fixed = fix_repetitions(hallucinated_transcript(400))
+    assert fixed.startswith("please turn on the kitchen lights")
+    assert len(fixed.split()) < 20
+
+def test_long_transcript_is_fast():
+    text = ' '.join(f"w{i}" for i in range(20000))  # No repeats: worst case for the scan
+    start = time.perf_counter()
+    assert truncate_repetition(text) == (text, None)
+    assert time.perf_counter() - start < 2.0
+
+def benchmark():
+    """Compare the linear detector with the legacy guard on growing transcripts"""
+    print(f"{'words':>8} {'legacy (ms)':>12} {'linear (ms)':>12}")
+    for words in (100, 300, 1000, 3000):
+        # Distinct words defeat early exits, so both do their full scan
+        text = ' '.join(f"w{i}" for i in range(words))
+        
+        start = time.perf_counter()
+        legacy_truncate(text)
+        legacy_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        truncate_repetition(text)
+        linear_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"{words:>8} {legacy_ms:>12.1f} {linear_ms:>12.1f}")
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_")]
+    for test in tests:
+        test()
+        print(f"✓ {test.__name__}")
+    print()
+    benchmark()
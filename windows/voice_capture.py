@@ -27,8 +27,21 @@ except ImportError:
     TTS_URL = "http://localhost:7002"
     CONNECT_TIMEOUT = 5.0
     READ_TIMEOUT = 180.0
+    STREAM_READ_TIMEOUT = 30.0
     ENABLE_STREAMING = True
     TTS_QUEUE_ENABLED = True
+    TTS_SENTENCE_BOUNDARIES = True
+
+# Config files from before heartbeats keep the long timeout for streams too
+if 'STREAM_READ_TIMEOUT' not in globals():
+    STREAM_READ_TIMEOUT = READ_TIMEOUT
+
+# Sentence segmenter shared with the bridge (copy services/sentence_segmenter.py next to this file)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "services"))
+try:
+    from sentence_segmenter import SentenceSegmenter
+except ImportError:
+    SentenceSegmenter = None
 
 # Configure logging
 logging.basicConfig(
@@ -54,6 +67,8 @@ class VoiceCapture:
         # TTS queue for streaming responses
         self.tts_queue = queue.Queue() if TTS_QUEUE_ENABLED else None
         self.tts_thread = None
+        self.segmenter = None  # Per-stream sentence grouping for message text
+        self.tts_voice = (DEFAULT_VOICE, {})
         
         # Calibrate for ambient noise
         with self.microphone as source:
@@ -110,12 +125,16 @@ class VoiceCapture:
             if self.tts_queue:
                 self.start_tts_thread()
             
+            # Speak whole sentences rather than every streamed fragment
+            if SentenceSegmenter and TTS_SENTENCE_BOUNDARIES:
+                self.segmenter = SentenceSegmenter()
+            
             # Make streaming request
             with requests.post(
                 f"{BRIDGE_URL}/voice/command",
                 json=payload,
                 stream=True,
-                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+                timeout=(CONNECT_TIMEOUT, STREAM_READ_TIMEOUT)  # Max silence between events
             ) as response:
                 
                 if response.status_code != 200:
@@ -134,6 +153,9 @@ class VoiceCapture:
                                 logger.warning(f"Invalid JSON in stream: {e}")
                                 continue
                 
+                # Speak any text still waiting for a sentence boundary
+                self.flush_segmenter()
+                
                 # Wait for TTS to finish
                 if self.tts_queue:
                     self.tts_queue.put(None)  # Signal end
@@ -141,7 +163,7 @@ class VoiceCapture:
                         self.tts_thread.join()
                         
         except requests.Timeout:
-            logger.error(f"Request timeout after {READ_TIMEOUT}s")
+            logger.error(f"No stream events for {STREAM_READ_TIMEOUT}s")
             self.speak_error(TIMEOUT_ERROR_MESSAGE)
         except requests.RequestException as e:
             logger.error(f"Request error: {e}")
@@ -226,24 +248,15 @@ class VoiceCapture:
             content = data.get("content", "")
             if content:
                 logger.debug(f"Message: {content[:50]}...")
-                if self.tts_queue:
-                    self.tts_queue.put({
-                        "text": content,
-                        "voice": data.get("voice", DEFAULT_VOICE),
-                        "config": data.get("voice_config", {})
-                    })
+                # The bridge already sends whole sentences; speak them as they are
+                self.queue_text(content, data, segment=False)
         
         elif event_type == "chunk":
             # Handle chunk events same as message
             content = data.get("content", "")
             if content:
                 logger.debug(f"Chunk: {content[:50]}...")
-                if self.tts_queue:
-                    self.tts_queue.put({
-                        "text": content,
-                        "voice": data.get("voice", DEFAULT_VOICE),
-                        "config": data.get("voice_config", {})
-                    })
+                self.queue_text(content, data)
         
         elif event_type == "result":
             # Speak final result if it contains text
@@ -282,6 +295,39 @@ class VoiceCapture:
             logger.error(f"Server error: {error_msg}")
             self.speak_error(f"Error: {error_msg}")
     
+    def queue_text(self, content: str, data: Dict[str, Any], segment: bool = True) -> None:
+        """Queue message text for TTS, grouping raw deltas into sentences when segmenting"""
+        if not self.tts_queue:
+            return
+        
+        self.tts_voice = (data.get("voice", DEFAULT_VOICE), data.get("voice_config", {}))
+        if not (segment and self.segmenter):
+            sentences = [content]
+            if self.segmenter:
+                # Speak buffered deltas first so the order is kept
+                sentences = self.segmenter.flush() + sentences
+        else:
+            sentences = self.segmenter.push(content) + self.segmenter.poll()
+        for sentence in sentences:
+            self.tts_queue.put({
+                "text": sentence,
+                "voice": self.tts_voice[0],
+                "config": self.tts_voice[1]
+            })
+    
+    def flush_segmenter(self) -> None:
+        """Queue text left in the segmenter at the end of a stream"""
+        if not (self.segmenter and self.tts_queue):
+            return
+        
+        for sentence in self.segmenter.flush():
+            self.tts_queue.put({
+                "text": sentence,
+                "voice": self.tts_voice[0],
+                "config": self.tts_voice[1]
+            })
+        self.segmenter = None
+    
     def start_tts_thread(self) -> None:
         """Start TTS processing thread"""
         if self.tts_thread and self.tts_thread.is_alive():
@@ -341,14 +387,14 @@ class VoiceCapture:
     def run(self) -> None:
         """Main loop"""
         logger.info("Voice capture started. Listening for wake words...")
-        logger.info(f"Timeouts configured: connect={CONNECT_TIMEOUT}s, read={READ_TIMEOUT}s")
+        logger.info(f"Timeouts configured: connect={CONNECT_TIMEOUT}s, read={READ_TIMEOUT}s, stream={STREAM_READ_TIMEOUT}s")
         logger.info(f"Streaming: {'enabled' if ENABLE_STREAMING else 'disabled'}")
         
         print("\n" + "="*60)
         print("VOICE ASSISTANT READY")
         print(f"Wake words: {', '.join(WAKE_WORDS.keys())}")
         print(f"Streaming: {'ON' if ENABLE_STREAMING else 'OFF'}")
-        print(f"Timeout: {READ_TIMEOUT}s")
+        print(f"Timeout: {READ_TIMEOUT}s (stream: {STREAM_READ_TIMEOUT}s between events)")
         print("Say 'exit' to quit")
         print("="*60 + "\n")
         
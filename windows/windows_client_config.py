@@ -9,7 +9,11 @@ TTS_URL = "http://localhost:7002"     # Local Windows TTS service
 
 # Timeout Configuration (in seconds)
 CONNECT_TIMEOUT = 5.0   # Time to establish connection
-READ_TIMEOUT = 180.0    # Time to wait for response (3 minutes for long MCP operations)
+READ_TIMEOUT = 180.0    # Time to wait for a response (3 minutes for long MCP operations)
+
+# Streaming reads only need to outlast the gap between bridge heartbeats
+HEARTBEAT_INTERVAL = 5.0  # The bridge's MCP_HEARTBEAT_INTERVAL (0 if heartbeats are disabled there)
+STREAM_READ_TIMEOUT = max(HEARTBEAT_INTERVAL * 6, 30.0) if HEARTBEAT_INTERVAL > 0 else READ_TIMEOUT
 
 # Previous timeout that caused issues
 # OLD_TIMEOUT = 30.0  # This was too short for Office MCP (~63s operations)